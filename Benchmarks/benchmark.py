@@ -0,0 +1,239 @@
+"""
+benchmark.py
+This file contains the headless benchmark suite for the hot paths of the game engine. It times the Model, the puzzle
+validater, the .puz parsing of the Controller and the Leaderboard data handling at several sizes, writes the results
+as JSON and compares them against a stored baseline so that performance regressions fail loudly.
+
+Run it from anywhere with: python -m Benchmarks.benchmark [--save-baseline]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT_PATH, "Benchmarks", "baseline.json")
+RESULTS_PATH = os.path.join(ROOT_PATH, "Benchmarks", "results.json")
+
+BOARD_SIZES = (9, 16, 100, 400, 2500)
+PUZZLE_SIZES = (9, 16, 100, 400)
+LEADERBOARD_SIZES = (1, 10, 100)  # number of puzzles with a full leaderboard
+TOLERANCE = 1.0  # allowed slowdown relative to the baseline before a case counts as a regression
+MIN_ROUND_TIME = 0.05  # seconds each timing round should last at least
+ROUNDS = 5
+
+# the game uses paths relative to the repository root
+os.chdir(ROOT_PATH)
+sys.path.insert(0, ROOT_PATH)
+
+from Model.model import Model  # noqa: E402
+from Model.puzzle_validater import is_solvable  # noqa: E402
+from Model.leaderboard_store import LeaderboardStore  # noqa: E402
+from Model.top_scores import TopScores  # noqa: E402
+from Model.replay import ReplayRecorder  # noqa: E402
+from Model.move_history import RIGHT  # noqa: E402
+from Controller.controller import Controller  # noqa: E402
+import View.leaderboard as leaderboard  # noqa: E402
+
+
+def time_case(funct, setup=None) -> float:
+    """
+    This function times the given function and returns the best time per call over several rounds. The number of
+    calls per round grows until a round lasts at least MIN_ROUND_TIME.
+    :param funct: the function to be timed. It receives the value returned by setup
+    :param setup: a function called before each round whose result is passed to funct. Not timed
+    :return: the best number of seconds per call
+    """
+    calls = 1
+    while True:
+        state = setup() if setup is not None else None
+        start = perf_counter()
+        for _ in range(calls):
+            funct(state)
+        elapsed = perf_counter() - start
+        if elapsed >= MIN_ROUND_TIME:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(ROUNDS - 1):
+        state = setup() if setup is not None else None
+        start = perf_counter()
+        for _ in range(calls):
+            funct(state)
+        best = min(best, (perf_counter() - start) / calls)
+    return best
+
+
+def benchmark_model(results: dict) -> None:
+    """
+    Times the Model hot paths at every board size
+    :param results: the dictionary the results are added to
+    :return: None
+    """
+    for size in BOARD_SIZES:
+        model = Model(size, seed=size)
+        moves = model.get_moves()
+
+        results[f"model.get_moves[{size}]"] = time_case(lambda _: model.get_moves())
+        results[f"model.is_done[{size}]"] = time_case(lambda _: model.is_done())
+
+        # moving a tile back and forth keeps the board the same between calls
+        def move_back_and_forth(_):
+            model.move_tile(moves[0])
+            model.move_tile(moves[0])
+        results[f"model.move_tile[{size}]"] = time_case(move_back_and_forth) / 2
+
+        results[f"model.create_board[{size}]"] = time_case(lambda _: model.create_board())
+
+        puzzle = model.get_puzzle()
+        results[f"puzzle_validater.is_solvable[{size}]"] = time_case(lambda _: is_solvable(puzzle))
+
+
+def write_puzzle_file(path: str, size: int) -> None:
+    """
+    Writes a .puz file of the given size whose tiles all use an image shipped with the game
+    :param path: the path of the .puz file
+    :param size: the number of tiles of the puzzle
+    :return: None
+    """
+    with open(path, mode="w", encoding="utf-8") as puzzle_file:
+        puzzle_file.write(f"name: benchmark{size}\nnumber: {size}\nsize: 10\n")
+        puzzle_file.write("thumbnail: Images/fifteen/fifteen_thumbnail.gif\n")
+        for tile in range(1, size + 1):
+            puzzle_file.write(f"{tile}: Images/fifteen/1.gif\n")
+
+
+def benchmark_open_puzzle(results: dict, directory: str) -> None:
+    """
+    Times the parsing of .puz files by the Controller at every puzzle size. The Controller is created without its
+    View so that no window is needed.
+    :param results: the dictionary the results are added to
+    :param directory: the temporary directory for the .puz files
+    :return: None
+    """
+    controller = Controller.__new__(Controller)
+    for size in PUZZLE_SIZES:
+        path = os.path.join(directory, f"benchmark{size}.puz")
+        write_puzzle_file(path, size)
+
+        def reset():
+            controller.puzzle_data = {}
+        results[f"controller.open_puzzle[{size}]"] = time_case(lambda _: controller.open_puzzle(path), reset)
+
+
+def benchmark_leaderboard(results: dict, directory: str) -> None:
+    """
+    Times adding entries to the Leaderboard and exporting it at every leaderboard size, and keeping a replay. The
+    Leaderboard is created without its turtle so that no window is needed, and it writes to a temporary database,
+    file and replays directory.
+    :param results: the dictionary the results are added to
+    :param directory: the temporary directory for the leaderboard files and replays
+    :return: None
+    """
+    leaderboard.LEADERBOARD_PATH = os.path.join(directory, "leaderboard.txt")
+    board = leaderboard.Leaderboard.__new__(leaderboard.Leaderboard)
+    board.store = LeaderboardStore(os.path.join(directory, "leaderboard.db"))
+    board.shown_puzzle = None
+    # a game won in one move: the blank moves right onto the last place
+    recorder = ReplayRecorder("puzzle0", "player", [1, 2, 3, 4, 5, 6, 7, 9, 8])
+    recorder.record(RIGHT)
+    replay = recorder.to_bytes()
+
+    def use_new_replays_directory():
+        # the cost of keeping a replay grows with the number of files in the directory, so every round starts empty
+        leaderboard.REPLAYS_PATH = tempfile.mkdtemp(dir=directory) + os.sep
+
+    for size in LEADERBOARD_SIZES:
+        def fill():
+            use_new_replays_directory()
+            board.puzzle_leader_data = {f"puzzle{puzzle}": TopScores(leaderboard.MAX_NUM_LEADERS,
+                                                                     [[f"player{rank}", 10 + rank, 10.0 + rank]
+                                                                      for rank in range(leaderboard.MAX_NUM_LEADERS)])
+                                        for puzzle in range(size)}
+
+        # the leaderboard prints every entry it adds, which is part of the cost but not of the output
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[f"leaderboard.add_entry[{size}]"] = time_case(
+                lambda _: board.add_entry(["puzzle0", "player", 1, 1.0], replay, 9), fill)
+        fill()
+        results[f"leaderboard.export_data[{size}]"] = time_case(lambda _: board.export_data())
+
+    # keeping the replay is part of add_entry, timed here on its own as well
+    results["leaderboard.save_replay"] = time_case(lambda _: board.save_replay("puzzle0", replay),
+                                                   use_new_replays_directory)
+    board.store.close()
+
+
+def run_benchmarks() -> dict:
+    """
+    Runs every benchmark case
+    :return: a dictionary from the case name to the best number of seconds per call
+    """
+    results = {}
+    benchmark_model(results)
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark_open_puzzle(results, directory)
+        benchmark_leaderboard(results, directory)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance=TOLERANCE) -> list[str]:
+    """
+    Compares the results against the baseline
+    :param results: the results of this run
+    :param baseline: the results of the baseline run
+    :param tolerance: the allowed slowdown as a fraction of the baseline time
+    :return: a description of every case that regressed
+    """
+    regressions = []
+    for case, seconds in results.items():
+        if case in baseline and seconds > baseline[case] * (1 + tolerance):
+            regressions.append(f"{case}: {seconds * 1e6:.2f}us vs baseline {baseline[case] * 1e6:.2f}us "
+                               f"({seconds / baseline[case]:.2f}x)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of the game engine without a display.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="where to write the JSON results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="the JSON baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown as a fraction of the baseline time")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    for case, seconds in results.items():
+        print(f"{case:45} {seconds * 1e6:12.2f}us")
+
+    with open(args.output, mode="w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, mode="w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, mode="r", encoding="utf-8") as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.tolerance)
+    if regressions:
+        print("PERFORMANCE REGRESSION")
+        print("\n".join(regressions))
+        return 1
+    print("no regressions against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+catalog_index.py
+This file contains the CatalogIndex class that keeps the parsed puzzle catalog on disk between runs.
+"""
+
+import json
+import os
+
+CATALOG_INDEX_PATH = "./catalog_index.json"
+INDEX_VERSION = 1
+
+
+class CatalogIndex:
+    """
+    CatalogIndex
+    This class stores the result of parsing and validating each .puz file, keyed by the path of the file along with
+    its modification time and size. A file whose modification time and size have not changed since it was indexed is
+    loaded from the index without opening it or checking its images again.
+    """
+
+    def __init__(self, path=CATALOG_INDEX_PATH) -> None:
+        """
+        Initializes the CatalogIndex and loads the index file if it exists
+        :param path: the path of the index file
+        """
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        self.load()
+
+    def load(self) -> None:
+        """
+        Loads the index file. A missing, unreadable or outdated index is treated as empty.
+        :return: None
+        """
+        try:
+            with open(self.path, mode="r", encoding="utf-8") as index_file:
+                index = json.load(index_file)
+            if index.get("version") == INDEX_VERSION:
+                self.entries = index["entries"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            self.entries = {}
+
+    def lookup(self, puzzle_path: str, stat: os.stat_result):
+        """
+        Returns the puzzles indexed for the given .puz file if the file has not changed since
+        :param puzzle_path: the path of the .puz file
+        :param stat: the current stat of the .puz file
+        :return: a dictionary of the puzzle data by puzzle name, or None if the file must be parsed again
+        """
+        entry = self.entries.get(puzzle_path)
+        if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            return None
+
+        # json keys are always strings, the tile numbers are turned back into integers
+        puzzles = {}
+        for name, data in entry["puzzles"].items():
+            puzzles[name] = dict(data, images={int(tile): image for tile, image in data["images"].items()})
+        return puzzles
+
+    def store(self, puzzle_path: str, stat: os.stat_result, puzzles: dict) -> None:
+        """
+        Records the puzzles parsed from the given .puz file. An empty dictionary records an invalid file.
+        :param puzzle_path: the path of the .puz file
+        :param stat: the stat of the .puz file when it was parsed
+        :param puzzles: a dictionary of the puzzle data by puzzle name
+        :return: None
+        """
+        self.entries[puzzle_path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "puzzles": puzzles}
+        self.changed = True
+
+    def prune(self, puzzle_paths) -> None:
+        """
+        Removes the entries of the .puz files that no longer exist
+        :param puzzle_paths: the paths of every existing .puz file
+        :return: None
+        """
+        for puzzle_path in set(self.entries) - set(puzzle_paths):
+            self.entries.pop(puzzle_path)
+            self.changed = True
+
+    def save(self) -> None:
+        """
+        Writes the index file if anything changed. The file is replaced in one step so it is never left half written.
+        :return: None
+        """
+        if not self.changed:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as index_file:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, index_file)
+        os.replace(temp_path, self.path)
+        self.changed = False
@@ -0,0 +1,107 @@
+"""
+catalog_loader.py
+This file contains the CatalogLoader class that parses the puzzle catalog on a pool of threads.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Controller.catalog_index import CatalogIndex
+
+CATALOG_WORKERS = 8  # threads parsing .puz files
+IMAGE_WORKERS = 16  # threads checking that tile images exist
+
+
+class CatalogLoader:
+    """
+    CatalogLoader
+    This class loads every .puz file of a directory. Files that are unchanged in the catalog index are taken from it,
+    the others are parsed on a bounded thread pool while their images are checked on a second one, since on slow
+    storage each check is a blocking round trip. The files are taken in the order of their names and the results are
+    merged in that order whatever order they finish in, so the catalog is the same on every machine and the same as
+    when the files are parsed one at a time: when two files hold a puzzle of the same name, the later file wins.
+    A single puzzle can be taken before that from whichever file holding it is validated first, see wait_for.
+    """
+
+    def __init__(self, read_puzzle_file, index=None, max_workers=CATALOG_WORKERS, image_workers=IMAGE_WORKERS):
+        """
+        Initializes the CatalogLoader
+        :param read_puzzle_file: the function that parses and validates one .puz file. It receives the path and the
+        executor for the image checks and returns the dictionary of the valid puzzles in the file by name
+        :param index: the CatalogIndex to use. A new one is loaded if not given
+        :param max_workers: the number of threads parsing .puz files
+        :param image_workers: the number of threads checking images
+        """
+        self.read_puzzle_file = read_puzzle_file
+        self.index = index if index is not None else CatalogIndex()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.image_pool = ThreadPoolExecutor(max_workers=image_workers)
+
+        # one entry per .puz file in name order: [path, stat, puzzles or the future parsing them]
+        self.files = []
+        self.merged = None
+
+    def start(self, puzzles_path: str) -> None:
+        """
+        Starts loading every .puz file of the given directory
+        :param puzzles_path: the directory of the .puz files, ending with a separator
+        :return: None
+        """
+        with os.scandir(puzzles_path) as entries:
+            # the listing order depends on the file system, so it is sorted to merge the same way everywhere
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if entry.name.find(".puz") > -1:
+                    path = puzzles_path + entry.name
+                    stat = entry.stat()
+                    puzzles = self.index.lookup(path, stat)
+                    if puzzles is None:
+                        puzzles = self.pool.submit(self.read_puzzle_file, path, self.image_pool)
+                    self.files.append([path, stat, puzzles])
+
+    def wait_for(self, puzzle_name: str):
+        """
+        Waits until the given puzzle has been validated, without waiting for the rest of the catalog. The puzzle is
+        taken from the first file holding it to be validated, which need not be the one merge keeps when several
+        files hold a puzzle of that name; the caller compares it with the merged catalog.
+        :param puzzle_name: the name of the puzzle
+        :return: the data of the puzzle, or None if no file holds a valid puzzle of that name
+        """
+        parsing = []
+        for _, _, puzzles in self.files:
+            if isinstance(puzzles, dict):
+                if puzzle_name in puzzles:
+                    return puzzles[puzzle_name]
+            else:
+                parsing.append(puzzles)
+        for future in as_completed(parsing):
+            puzzles = future.result()
+            if puzzle_name in puzzles:
+                return puzzles[puzzle_name]
+        return None
+
+    def is_done(self) -> bool:
+        """
+        Returns whether every file has been loaded
+        :return: True if every file has been loaded. False otherwise
+        """
+        return all(isinstance(puzzles, dict) or puzzles.done() for _, _, puzzles in self.files)
+
+    def merge(self) -> dict:
+        """
+        Waits for every file, merges the puzzles in name order and updates the catalog index
+        :return: a dictionary of the data of every valid puzzle by name
+        """
+        if self.merged is not None:
+            return self.merged
+
+        self.merged = {}
+        for path, stat, puzzles in self.files:
+            if not isinstance(puzzles, dict):
+                puzzles = puzzles.result()
+                self.index.store(path, stat, puzzles)
+            self.merged.update(puzzles)
+
+        self.index.prune([path for path, _, _ in self.files])
+        self.index.save()
+        self.pool.shutdown()
+        self.image_pool.shutdown()
+        return self.merged
@@ -3,13 +3,30 @@ controller.py
 This file contains the Controller class that dictates the flow of the overall game.
 """
 from Model.model import Model
+from Model.reduction_solver import ReductionSolver
+from Model.replay import ReplayRecorder
 from View.view import View
 import os
 from Controller.error_logger import log_error
+from Controller.hint import Hint
+from Controller.catalog_loader import CatalogLoader
+from Controller.metrics import timed, count
 import turtle
+from time import perf_counter
 
 PUZZLES_PATH = "./Puzzles/"  # directory where the puzzle data is stored
 IMAGES_PATH = "./Images/"  # directory where the puzzle data is stored
+HINT_POLL_INTERVAL = 100  # milliseconds between checks for a finished hint search
+SOLVE_MOVES_PER_SECOND = 5  # default playback rate of the solve mode
+MIN_MOVES_PER_SECOND = 0.625  # slowest playback rate reachable with the - key
+MAX_MOVES_PER_SECOND = 1280  # fastest playback rate reachable with the + key, many moves are shown per frame
+SPEED_STEP = 2  # factor the + and - keys change the playback rate by
+FRAME_INTERVAL = 16  # milliseconds between the frames of the solve playback
+CATALOG_POLL_INTERVAL = 50  # milliseconds between checks for the rest of the puzzle catalog
+SEARCHING_MESSAGE = "Searching for a hint..."
+NO_HINT_MESSAGE = "No hint available: the search ran out of time"
+NOT_OPTIMAL_HINT_MESSAGE = "Not optimal: this hint follows a longer solution"
+FALLBACK_SOLUTION_MESSAGE = "No optimal solution in time: playing a longer one"
 
 
 class Controller:
@@ -30,63 +47,100 @@ class Controller:
 
         self.selected_puzzle = "mario"
         self.max_moves = 5  # might not need depending on the type of play
-        self.get_all_puzzle_info()
+        self.hint = Hint()
+        self.moves_per_second = SOLVE_MOVES_PER_SECOND
+        self.is_solving = False
+        self.auto_solved = False  # games finished with the solve mode or the reset button do not enter the leaderboard
+        self.playback = 0  # identifies the current playback so that frames of a stopped one are dropped
+        self.playback_start = 0
+        self.playback_moves = 0
+
+        # the game starts as soon as the first puzzle is validated, the rest of the catalog is merged in later
+        self.catalog_loader = None
+        self.start_catalog_loading()
+        selected_puz = self.catalog_loader.wait_for(self.selected_puzzle)
+        if selected_puz is None:
+            self.finish_catalog_loading()
+        else:
+            self.puzzle_data[self.selected_puzzle] = selected_puz
 
         self.view = View()
+        # the first puzzle is decoded while the player enters their name
+        self.view.preload_puzzle(self.puzzle_data[self.selected_puzzle])
         self.player_name = self.view.get_player_name()
+        # the playback rate of the solve mode is changed with the + and - keys
+        self.view.screen.onkey(lambda: self.change_moves_per_second(SPEED_STEP), "plus")
+        self.view.screen.onkey(lambda: self.change_moves_per_second(SPEED_STEP), "equal")
+        self.view.screen.onkey(lambda: self.change_moves_per_second(1 / SPEED_STEP), "minus")
         self.new_game(self.selected_puzzle)
+        self.wait_for_catalog()
 
-    def import_meta_data(self, puzzle_meta_data: list) -> bool:
+    def import_meta_data(self, puzzle_meta_data: list, puzzle_data=None) -> bool:
         """
         This function extracts the metadata regarding each puzzle: name, number of pieces, the size of the pieces and
         the thumbnail of the actual puzzle. It returns True if the metadata format matches. False otherwise
         :param puzzle_meta_data: The metadata of the puzzles
+        :param puzzle_data: the dictionary to add the puzzle to. The instance's dictionary if not given
         :return: True if the metadata format matches. False otherwise
         """
+        if puzzle_data is None:
+            puzzle_data = self.puzzle_data
         # print(tuple([data[0] for data in puzzle_meta_data]))
         if tuple([data[0] for data in puzzle_meta_data]) != ("name", "number", "size", "thumbnail"):
             return False
         else:
-            self.puzzle_data[puzzle_meta_data[0][1]] = {"number": int(puzzle_meta_data[1][1]),
-                                                        "size": int(puzzle_meta_data[2][1]),
-                                                        "thumbnail": "./" + puzzle_meta_data[3][1], "images": {}}
+            puzzle_data[puzzle_meta_data[0][1]] = {"number": int(puzzle_meta_data[1][1]),
+                                                   "size": int(puzzle_meta_data[2][1]),
+                                                   "thumbnail": "./" + puzzle_meta_data[3][1], "images": {}}
             return True
 
-    def import_image_data(self, puzzle_image_data, puzzle_name: str) -> None:
+    def import_image_data(self, puzzle_image_data, puzzle_name: str, puzzle_data=None, executor=None) -> None:
         """
         This function extracts all the image paths for the tile pieces from the puzzle data and the puzzle name. The
         data is kept if all the images are exists. If the data does not exist, the puzzle entry is removed from the
         main dictionary data structure that holds all the puzzle information
         :param puzzle_image_data: the raw data of all the puzzles
         :param puzzle_name: the name of the puzzle
+        :param puzzle_data: the dictionary holding the puzzle. The instance's dictionary if not given
+        :param executor: the executor to check the images on in parallel. They are checked one by one if not given
         :return: None
         """
+        if puzzle_data is None:
+            puzzle_data = self.puzzle_data
         # image_data is stored as [number, path]
+        image_paths = [f"./{image_data[1]}" for image_data in puzzle_image_data]
+        if executor is not None:
+            # the results come back in order, so the first missing image is the same one reported either way
+            image_exists = executor.map(os.path.exists, image_paths)
+        else:
+            image_exists = map(os.path.exists, image_paths)
+
         image_dict = {}
-        count = 0
-        for image_data in puzzle_image_data:
-            count += 1
-            image_path = f"./{image_data[1]}"
-            if os.path.exists(f"./{image_data[1]}"):
+        num_images = 0
+        for image_data, image_path, exists in zip(puzzle_image_data, image_paths, image_exists):
+            num_images += 1
+            if exists:
                 image_dict[int(image_data[0])] = image_path
             else:
                 log_error(f"{FileNotFoundError} \t {image_data[1]} not found")
                 # remove the entry so that it cannot be loaded
-                self.puzzle_data.pop(puzzle_name)
+                puzzle_data.pop(puzzle_name)
                 return
 
         # check to make sure num of image paths match the reported metadata 
-        if count < self.puzzle_data[puzzle_name]['number'] - 1:
-            self.puzzle_data.pop(puzzle_name)
+        if num_images < puzzle_data[puzzle_name]['number'] - 1:
+            puzzle_data.pop(puzzle_name)
             return
 
-        self.puzzle_data[puzzle_name]["images"] = image_dict
+        puzzle_data[puzzle_name]["images"] = image_dict
 
-    def open_puzzle(self, puzzle_path) -> None:
+    def open_puzzle(self, puzzle_path, puzzle_data=None, executor=None) -> None:
         """
         This function opens .puz files with the given path. If the file does not exist, the error is logged.
         The data is parsed and extracted to the instance's dictionary of all puzzle data
         :param puzzle_path: The path of the .puz file
+        :param puzzle_data: the dictionary to add the puzzles to. The instance's dictionary if not given
+        :param executor: the executor to check the images on in parallel
         :return: None
         """
         try:
@@ -100,21 +154,67 @@ class Controller:
             # process raw data list to dictionary
 
             # first processing metadata regarding a puzzle
-            if self.import_meta_data(puzzle_data_list[:4]):
-                self.import_image_data(puzzle_data_list[4:], puzzle_data_list[0][1])
+            if self.import_meta_data(puzzle_data_list[:4], puzzle_data):
+                self.import_image_data(puzzle_data_list[4:], puzzle_data_list[0][1], puzzle_data, executor)
 
         except FileNotFoundError as err:
             log_error(f"{err} \t {puzzle_path} not found.")
 
+    @timed("controller_get_all_puzzle_info")
     def get_all_puzzle_info(self) -> None:
         """
-        This function parses all the puzzles available in the game to load the metadata
+        This function parses all the puzzles available in the game to load the metadata. Puzzles that have not
+        changed since the last run are taken from the catalog index, the others are parsed in parallel
+        :return: None
+        """
+        self.start_catalog_loading()
+        self.finish_catalog_loading()
+
+    @timed("controller_start_catalog_loading")
+    def start_catalog_loading(self) -> None:
+        """
+        This function starts parsing the puzzles in the background, see CatalogLoader
+        :return: None
+        """
+        self.catalog_loader = CatalogLoader(self.read_puzzle_file)
+        self.catalog_loader.start(PUZZLES_PATH)
+
+    @timed("controller_finish_catalog_loading")
+    def finish_catalog_loading(self) -> None:
+        """
+        This function waits for every puzzle and replaces the puzzle data with the full catalog. The game started
+        before the merge may be of a puzzle that a later file overrides, in which case it is restarted with the
+        puzzle the catalog keeps.
         :return: None
         """
-        for path in os.listdir(PUZZLES_PATH):
-            if path.find(".puz") > -1:
-                self.open_puzzle(PUZZLES_PATH + path)
+        playing = self.puzzle_data.get(self.selected_puzzle)
+        self.puzzle_data = self.catalog_loader.merge()
+        if self.model is not None and self.puzzle_data.get(self.selected_puzzle, playing) != playing:
+            self.new_game(self.selected_puzzle)
 
+    def wait_for_catalog(self) -> None:
+        """
+        This function takes the full catalog once the background parsing is done, without blocking the game
+        :return: None
+        """
+        if self.catalog_loader.is_done():
+            self.finish_catalog_loading()
+        else:
+            self.view.screen.ontimer(self.wait_for_catalog, CATALOG_POLL_INTERVAL)
+
+    def read_puzzle_file(self, puzzle_path: str, executor=None) -> dict:
+        """
+        This function parses and validates a single .puz file on its own. It does not touch the instance's puzzle
+        data, so several files can be read at once on different threads
+        :param puzzle_path: The path of the .puz file
+        :param executor: the executor to check the images on in parallel
+        :return: a dictionary of the valid puzzle data in the file by puzzle name. Empty if the file is invalid
+        """
+        puzzle_data = {}
+        self.open_puzzle(puzzle_path, puzzle_data, executor)
+        return puzzle_data
+
+    @timed("controller_new_game")
     def new_game(self, puzzle_name: str) -> None:
         """
         creates a new game based on the name that has been passed
@@ -122,13 +222,23 @@ class Controller:
         :return: None
         """
 
-        selected_puz = self.puzzle_data[puzzle_name]
-        self.model = Model(selected_puz['number'])
-        self.view.setup()
-        self.view.leaderboard_area.show_leaderboard(puzzle_name)
-        self.view.set_puzzle(selected_puz)
-        self.view.create_tiles(self.model.get_puzzle())
-        self.view.screen.onscreenclick(self.run)
+        # the new board is drawn in one frame
+        with self.view.renderer.frame():
+            selected_puz = self.puzzle_data[puzzle_name]
+            self.model = Model(selected_puz['number'])
+            # every move is recorded so that the leaderboard can check the score
+            self.model.recorder = ReplayRecorder(puzzle_name, self.player_name, self.model.get_puzzle())
+            self.stop_solve()
+            self.auto_solved = False
+            self.hint.clear()
+            self.view.clear_hint()
+            self.view.setup()
+            self.view.leaderboard_area.show_leaderboard(puzzle_name)
+            self.view.set_puzzle(selected_puz)
+            self.view.create_tiles(self.model.get_puzzle())
+            self.view.screen.onscreenclick(self.run)
+            # the keys go to the game window again after the name and puzzle prompts
+            self.view.screen.listen()
 
     def set_max_moves(self, max_moves: int) -> None:
         """
@@ -140,11 +250,37 @@ class Controller:
             return ValueError("the maximum number of plays must be a positive number")
         self.max_moves = max_moves
 
+    def set_moves_per_second(self, moves_per_second: float) -> None:
+        """
+        Sets the playback rate of the solve mode
+        :param moves_per_second: the number of moves shown per second
+        :return: None
+        """
+        if moves_per_second <= 0:
+            raise ValueError("the playback rate must be a positive number")
+        self.moves_per_second = moves_per_second
+        # a running playback carries on from its current move at the new rate
+        self.playback_start = perf_counter()
+        self.playback_moves = 0
+
+    def change_moves_per_second(self, factor: float) -> None:
+        """
+        Multiplies the playback rate of the solve mode by the given factor, within the allowed rates, and shows it
+        :param factor: the factor to change the rate by
+        :return: None
+        """
+        self.set_moves_per_second(min(MAX_MOVES_PER_SECOND,
+                                      max(MIN_MOVES_PER_SECOND, self.moves_per_second * factor)))
+        with self.view.renderer.frame():
+            self.view.show_message(f"Solve speed: {self.moves_per_second:g} moves per second")
+
     def load_puzzle(self) -> None:
         """
         This function prompts the user with an input window to get the puzzle name to be played
         :return: None
         """
+        # the list must show every puzzle, so the rest of the catalog is waited for if it is still loading
+        self.finish_catalog_loading()
         selected_puzzle = ""  # initially set to empty sting to enter the loop
         puzzles = [puzzle_name for puzzle_name in self.puzzle_data.keys()]
         while selected_puzzle not in puzzles and selected_puzzle is not None:
@@ -158,14 +294,177 @@ class Controller:
             self.is_playing = True
             self.new_game(selected_puzzle)
 
+    def show_hint(self) -> None:
+        """
+        This function highlights the next optimal tile to move. The cached solution is used when the player has
+        followed it, otherwise a search is started in the background and checked on with the turtle timer so the
+        game keeps responding. The player is told while the search runs and if it gives up.
+        :return: None
+        """
+        if not self.is_playing:
+            return
+        tile = self.hint.get_hint()
+        if tile is not None:
+            with self.view.renderer.frame():
+                self.highlight_hint(tile)
+        else:
+            self.hint.request(self.model.get_puzzle())
+            if self.hint.is_searching():
+                # shown right away, also when the search is started again from the timer, outside of a click
+                with self.view.renderer.frame():
+                    self.view.show_message(SEARCHING_MESSAGE)
+            self.wait_for_hint()
+
+    def highlight_hint(self, tile: int) -> None:
+        """
+        This function highlights the hinted tile, telling the player when it is not from an optimal solution
+        :param tile: the tile to move
+        :return: None
+        """
+        self.view.show_hint(tile)
+        if not self.hint.is_optimal():
+            self.view.show_message(NOT_OPTIMAL_HINT_MESSAGE)
+
+    def wait_for_hint(self) -> None:
+        """
+        This function shows the hint once the background search is done, checking again later while it runs
+        :return: None
+        """
+        if self.hint.is_searching():
+            self.view.screen.ontimer(self.wait_for_hint, HINT_POLL_INTERVAL)
+            return
+        if not self.is_playing:
+            return
+        tile = self.hint.get_hint()
+        if tile is None and not self.hint.has_failed():
+            # the player left the solution while it was being searched for, so the current board is searched
+            self.show_hint()
+            return
+        with self.view.renderer.frame():
+            if tile is not None:
+                self.highlight_hint(tile)
+            else:
+                self.view.show_message(NO_HINT_MESSAGE)
+
+    def toggle_solve(self) -> None:
+        """
+        This function starts the solve mode, or stops it if it is running. The solution is found in the background
+        like a hint and is then played back move by move
+        :return: None
+        """
+        if self.is_solving:
+            self.stop_solve()
+            return
+        if not self.is_playing:
+            return
+        self.is_solving = True
+        self.playback += 1
+        playback = self.playback
+        self.view.clear_hint()
+        if self.hint.get_hint() is None:
+            self.hint.request(self.model.get_puzzle())
+        self.wait_for_solution(playback)
+
+    def wait_for_solution(self, playback: int) -> None:
+        """
+        This function starts the playback once the solution has been found. If the optimal search ran out of time, a
+        longer solution from the ReductionSolver is played instead. The game only stops counting for the leaderboard
+        once the playback starts.
+        :param playback: the playback this check belongs to
+        :return: None
+        """
+        if playback != self.playback or not self.is_solving:
+            return
+        if self.hint.is_searching():
+            self.view.screen.ontimer(lambda: self.wait_for_solution(playback), HINT_POLL_INTERVAL)
+            return
+        if self.hint.get_hint() is None and self.hint.has_failed():
+            self.hint.use_path(ReductionSolver(self.model).solve())
+            self.view.show_message(FALLBACK_SOLUTION_MESSAGE)
+        if self.hint.get_hint() is None:
+            self.stop_solve()
+            return
+
+        self.auto_solved = True
+        self.playback_start = perf_counter()
+        self.playback_moves = 0
+        self.play_frame(playback)
+
+    def play_frame(self, playback: int) -> None:
+        """
+        This function shows one frame of the playback. Every move that is due at the playback rate is made and shown
+        with a single screen update. The playback stops when the puzzle is solved or the player leaves the solution.
+        :param playback: the playback this frame belongs to
+        :return: None
+        """
+        if playback != self.playback or not self.is_solving:
+            return
+        due = int((perf_counter() - self.playback_start) * self.moves_per_second) + 1
+        with self.view.renderer.frame():
+            while self.playback_moves < due:
+                tile = self.hint.get_hint()
+                if tile is None:
+                    break
+                self.model.move_tile(tile)
+                self.hint.advance(tile)
+                self.view.move_tile(tile)
+                self.playback_moves += 1
+
+            self.view.update_move_count(self.model.get_play_count())
+            if self.model.is_done():
+                self.win()
+
+        if not self.is_playing:
+            return
+        if self.hint.get_hint() is None:
+            self.stop_solve()
+        else:
+            self.view.screen.ontimer(lambda: self.play_frame(playback), FRAME_INTERVAL)
+
+    def stop_solve(self) -> None:
+        """
+        This function stops the solve mode
+        :return: None
+        """
+        if not self.is_solving:
+            return
+        self.is_solving = False
+        self.playback += 1
+
+    def step_history(self, step) -> None:
+        """
+        This function undoes or redoes a move. The tile slides back to where it was on the screen, without the board
+        being created again
+        :param step: the undo or redo method of the model
+        :return: None
+        """
+        if not self.is_playing:
+            return
+        self.stop_solve()
+        tile = step()
+        if tile is None:
+            return
+        self.hint.advance(tile)
+        self.view.clear_hint()
+        self.view.move_tile(tile)
+        self.view.update_move_count(self.model.get_play_count())
+        if self.model.is_done():
+            self.win()
+
     def win(self):
+        self.stop_solve()
         self.view.win()
         self.is_playing = False
+        if self.auto_solved:
+            return
         self.view.leaderboard_area.add_entry([self.selected_puzzle,
                                               self.player_name,
                                               self.model.get_play_count(),
-                                              self.model.end_timer()])
+                                              self.model.end_timer()],
+                                             self.model.recorder.to_bytes(),
+                                             self.puzzle_data[self.selected_puzzle]["number"])
 
+    @timed("controller_run")
     def run(self, x, y) -> None:
         """
         This function runs the game with a given x, y coordinates representing a click on the game window
@@ -174,30 +473,49 @@ class Controller:
         :return: None
         """
 
-        # if the game is won, there are no moves available
-        if not self.is_playing:
-            moves = []
-        else:
-            moves = self.model.get_moves()
-
-        command = self.view.process_clicks(x, y, moves)
-
-        match command:
-            case 'load':
-                print("load pressed")
-                self.load_puzzle()
-            case 'reset':
-                self.model.set_puzzle([x for x in range(1, self.puzzle_data[self.selected_puzzle]["number"] + 1)])
-            case 'quit':
-                print("quit pressed")
-            case 'replay':
-                self.new_game(self.selected_puzzle)
-            case _:
-                if command is not None:
-                    self.model.move_tile(command)
-                    self.view.update_move_count(self.model.get_play_count())
-                    if self.model.is_done():
-                        self.win()
+        # everything the click changes is shown in one frame
+        with self.view.renderer.frame():
+            # if the game is won, there are no moves available
+            if not self.is_playing:
+                moves = []
+            else:
+                moves = self.model.get_moves()
+
+            command = self.view.process_clicks(x, y, moves)
+
+            match command:
+                case 'load':
+                    print("load pressed")
+                    self.load_puzzle()
+                case 'reset':
+                    self.model.set_puzzle([x for x in
+                                           range(1, self.puzzle_data[self.selected_puzzle]["number"] + 1)])
+                    # the board was put back in order for the player, so the game cannot enter the leaderboard
+                    self.auto_solved = True
+                    self.stop_solve()
+                    self.hint.clear()
+                    self.view.clear_hint()
+                case 'quit':
+                    print("quit pressed")
+                case 'replay':
+                    self.new_game(self.selected_puzzle)
+                case 'hint':
+                    self.show_hint()
+                case 'solve':
+                    self.toggle_solve()
+                case 'undo':
+                    self.step_history(self.model.undo)
+                case 'redo':
+                    self.step_history(self.model.redo)
+                case _:
+                    if command is not None:
+                        self.model.move_tile(command)
+                        count("tile_moves")
+                        self.hint.advance(command)
+                        self.view.clear_hint()
+                        self.view.update_move_count(self.model.get_play_count())
+                        if self.model.is_done():
+                            self.win()
 
 
 if __name__ == "__main__":
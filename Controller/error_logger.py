@@ -1,20 +1,163 @@
 """
 error_logger.py
-This file contains the error logger function.
+This file contains the error logger function and the ErrorLogger class that writes the errors in the background.
 """
 
+import atexit
+import os
+import threading
 from datetime import date
+from time import monotonic
+
 ERROR_PATH = "./error.txt"
+FLUSH_INTERVAL = 1.0  # seconds between two writes of the buffered errors
+RATE_LIMIT = 5  # entries of the same message written per rate window, the rest are only counted
+RATE_WINDOW = 60.0  # seconds
+MAX_LOG_SIZE = 1024 * 1024  # bytes the error file may reach before it is rotated
+BACKUP_COUNT = 3  # number of rotated error files kept as error.txt.1, error.txt.2, ...
+MAX_TRACKED_MESSAGES = 1000  # distinct messages whose rate is tracked at once
+
+
+class ErrorLogger:
+    """
+    ErrorLogger
+    This class buffers the errors in memory and writes them to the error file from a background thread, so logging
+    never waits on the disk. Each write collapses repeated messages into one entry with a count, and each message
+    gets at most RATE_LIMIT entries per RATE_WINDOW; the repeats past the limit are counted and reported with the
+    next entry of the message. The file is rotated once it reaches MAX_LOG_SIZE. Whatever is buffered is written
+    when the program exits.
+    """
+
+    def __init__(self, path=ERROR_PATH, flush_interval=FLUSH_INTERVAL) -> None:
+        """
+        Initializes the ErrorLogger. The background thread starts with the first error.
+        :param path: the path of the error file
+        :param flush_interval: the number of seconds between two writes
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self.lock = threading.Lock()  # guards the buffer, which is filled by any thread
+        self.write_lock = threading.Lock()  # one write at a time, from the thread or at exit
+        self.pending = {}  # message: number of times logged since the last write, in order of first occurrence
+        # message: [start of its rate window, entries written in the window, repeats not written]
+        self.rates = {}
+
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.is_closed = False
+        atexit.register(self.close)
+
+    def log(self, message: str) -> None:
+        """
+        Buffers an error to be written by the background thread
+        :param message: The message that describes the error
+        :return: None
+        """
+        with self.lock:
+            self.pending[message] = self.pending.get(message, 0) + 1
+            if self.thread is None and not self.is_closed:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self) -> None:
+        """
+        Writes the buffered errors every flush interval until the logger is closed
+        :return: None
+        """
+        while not self.is_closed:
+            self.wakeup.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self, final=False) -> None:
+        """
+        Writes the buffered errors to the error file
+        :param final: whether to also report the repeats held back by the rate limit, used at exit
+        :return: None
+        """
+        with self.write_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+
+            now = monotonic()
+            entries = []
+            for message, count in pending.items():
+                rate = self.rates.get(message)
+                if rate is None or now - rate[0] >= RATE_WINDOW:
+                    # a new window, the repeats held back in the last one are reported with this entry
+                    count += 0 if rate is None else rate[2]
+                    rate = self.rates[message] = [now, 0, 0]
+                if rate[1] >= RATE_LIMIT:
+                    rate[2] += count
+                    continue
+                rate[1] += 1
+                entries.append((message, count))
+
+            if final:
+                entries.extend((message, rate[2]) for message, rate in self.rates.items() if rate[2] > 0)
+                self.rates.clear()
+            elif len(self.rates) > MAX_TRACKED_MESSAGES:
+                # forget the messages whose window is over and that have nothing held back
+                self.rates = {message: rate for message, rate in self.rates.items()
+                              if now - rate[0] < RATE_WINDOW or rate[2] > 0}
+
+            if entries:
+                self.write(entries)
+
+    def write(self, entries: list) -> None:
+        """
+        Appends entries to the error file, rotating it first if it would grow past MAX_LOG_SIZE
+        :param entries: a list of (message, count) tuples
+        :return: None
+        """
+        today = date.today()
+        text = "".join(f"{today} {message} \n" if count == 1 else f"{today} {message} (x{count}) \n"
+                       for message, count in entries)
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(text) > MAX_LOG_SIZE:
+                self.rotate()
+            with open(self.path, mode='a', encoding='utf-8') as error_file:
+                error_file.write(text)
+        except OSError:
+            # there is nowhere left to report the error to
+            pass
+
+    def rotate(self) -> None:
+        """
+        Moves the error file to error.txt.1, shifting the older files up and dropping the oldest
+        :return: None
+        """
+        for backup in range(BACKUP_COUNT - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{backup}"):
+                os.replace(f"{self.path}.{backup}", f"{self.path}.{backup + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self) -> None:
+        """
+        Stops the background thread and writes everything still buffered
+        :return: None
+        """
+        with self.lock:
+            self.is_closed = True
+            thread = self.thread
+        self.wakeup.set()
+        if thread is not None:
+            thread.join()
+        self.flush(final=True)
+
+
+logger = ErrorLogger()
 
 
 def log_error(message: str) -> None:
     """
-    This function logs errors with the current date and the given error to an error file
+    This function logs errors with the current date and the given error to an error file. The error is written in
+    the background, see ErrorLogger
     :param message: The message that describes the error
     :return: None
     """
-    with open(ERROR_PATH, mode='a', encoding='utf-8') as error_file:
-        error_file.write(f"{date.today()} {message} \n")
+    logger.log(message)
+
 
 if __name__ == '__main__':
-    log_error("test")
\ No newline at end of file
+    log_error("test")
@@ -0,0 +1,176 @@
+"""
+hint.py
+This file contains the Hint class that finds and caches the optimal solution used to give the player hints.
+"""
+
+import threading
+from Controller.error_logger import log_error
+from Model.distance_database import DistanceDatabase
+from Model.solver import Solver, SearchCancelled, get_database
+
+HINT_TIME_LIMIT = 30  # seconds a hint search may take before giving up
+
+
+class Hint:
+    """
+    Hint
+    This class gives the next optimal tile to move. The solution is searched for on a background thread so the
+    game keeps responding, and it is kept for the rest of the game: while the player follows it, each move only
+    advances a cursor along the path. The path is dropped as soon as the player makes a different move.
+    If the distance database has been built for the board size, the solution is read from it right away instead.
+    Apart from the search itself, every method is meant to be called from the turtle event thread.
+    """
+
+    def __init__(self, time_limit=HINT_TIME_LIMIT) -> None:
+        """
+        Initializes the Hint class without a solution
+        :param time_limit: the number of seconds a search may take
+        """
+        self.time_limit = time_limit
+        self.path = None
+        self.cursor = 0
+        # whether the last search gave up without a solution
+        self.failed = False
+        # whether the path is an optimal solution, as opposed to one given to use_path
+        self.optimal = True
+
+        self.solver = None
+        self.thread = None
+        # each search gets its own list to put its result in so a cancelled search cannot overwrite a newer one
+        self.result = []
+        # moves made by the player while the search is running, replayed against the path once it is found
+        self.moves_since_request = []
+
+    def request(self, puzzle: list[int]) -> None:
+        """
+        Starts searching for the solution of the given puzzle on a background thread, unless a search is running.
+        Boards covered by the distance database are solved at once, without a thread.
+        :param puzzle: the list of integers representing the current puzzle
+        :return: None
+        """
+        if self.thread is not None:
+            return
+        self.path = None
+        self.cursor = 0
+        self.failed = False
+        self.optimal = True
+        self.result = []
+        self.moves_since_request = []
+        distances = get_database(len(puzzle))
+        if isinstance(distances, DistanceDatabase):
+            try:
+                self.path = distances.get_solution(puzzle)
+            except ValueError:
+                self.path = None
+                self.failed = True
+            return
+        self.solver = Solver(puzzle)
+        self.thread = threading.Thread(target=self.search, args=(self.solver, self.result), daemon=True)
+        self.thread.start()
+
+    def search(self, solver: Solver, result: list) -> None:
+        """
+        Runs the search on the background thread. The path is handed over by appending it to the result list, which
+        collect picks up on the event thread.
+        :param solver: the solver of the puzzle
+        :param result: the list to put the path in. The path is None if no solution was found
+        :return: None
+        """
+        try:
+            result.append(solver.solve(self.time_limit))
+        except (TimeoutError, SearchCancelled, ValueError):
+            result.append(None)
+        except Exception as err:
+            # any other failure must still hand over a result, or the hint would wait for the search forever
+            log_error(f"{err} \t the hint search failed.")
+            result.append(None)
+
+    def collect(self) -> None:
+        """
+        Takes the result of a finished search and advances it by the moves the player made in the meantime
+        :return: None
+        """
+        if self.thread is None or not self.result:
+            return
+        self.thread.join()
+        self.thread = None
+        self.path = self.result[0]
+        self.cursor = 0
+        self.failed = self.path is None
+        for tile in self.moves_since_request:
+            self.advance(tile)
+        self.moves_since_request = []
+
+    def is_searching(self) -> bool:
+        """
+        Returns whether a search is still running
+        :return: True if a search is still running. False otherwise
+        """
+        self.collect()
+        return self.thread is not None
+
+    def has_failed(self) -> bool:
+        """
+        Returns whether the last search gave up, as opposed to its solution being dropped by the player's moves
+        :return: True if the last search found no solution. False otherwise
+        """
+        self.collect()
+        return self.failed
+
+    def get_hint(self):
+        """
+        Returns the next tile to move along the cached solution
+        :return: the tile to move, or None if there is no solution for the current board yet
+        """
+        self.collect()
+        if self.path is not None and self.cursor < len(self.path):
+            return self.path[self.cursor]
+        return None
+
+    def use_path(self, path: list[int]) -> None:
+        """
+        Takes a solution found some other way as the path to follow, used by the solve mode when the search gave up.
+        Such a solution need not be optimal, so the hints along it are marked as not optimal.
+        :param path: the list of tiles to move from the current board
+        :return: None
+        """
+        self.path = path
+        self.cursor = 0
+        self.failed = False
+        self.optimal = False
+
+    def is_optimal(self) -> bool:
+        """
+        Returns whether the hints come from an optimal solution
+        :return: True if the path was found by the search or the distance database. False if it was given to use_path
+        """
+        return self.optimal
+
+    def advance(self, tile: int) -> None:
+        """
+        Records a move made by the player. Following the solution moves the cursor along it, any other move drops it.
+        :param tile: the tile that was moved
+        :return: None
+        """
+        if self.thread is not None:
+            self.moves_since_request.append(tile)
+        elif self.path is not None:
+            if self.cursor < len(self.path) and self.path[self.cursor] == tile:
+                self.cursor += 1
+            else:
+                self.path = None
+
+    def clear(self) -> None:
+        """
+        Drops the cached solution and cancels a running search, used when the board is replaced
+        :return: None
+        """
+        if self.thread is not None:
+            self.solver.cancel()
+            self.thread = None
+        self.path = None
+        self.cursor = 0
+        self.failed = False
+        self.optimal = True
+        self.result = []
+        self.moves_since_request = []
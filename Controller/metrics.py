@@ -0,0 +1,250 @@
+"""
+metrics.py
+This file contains the timers and counters that measure the hot paths of the game, and their export.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+METRICS_ENV = "PUZZLE_METRICS"  # set to "json" or "prometheus" to turn the metrics on when the game starts
+METRICS_PATHS = {"json": "./metrics.json", "prometheus": "./metrics.prom"}
+EXPORT_INTERVAL = 10.0  # seconds between two exports
+QUANTILES = (0.5, 0.95, 0.99)
+# bucket upper bounds in seconds, four per doubling from 1 microsecond to about 16 seconds
+BUCKET_BOUNDS = [1e-6 * 2 ** (step / 4) for step in range(4 * 24 + 1)]
+
+
+class Histogram:
+    """
+    Histogram
+    This class counts latencies in fixed buckets that grow by a factor of 2 ** (1 / 4), so recording a value is a
+    binary search and the memory used never grows. Quantiles are read from the buckets and are within about 19% of
+    the exact value.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty Histogram
+        """
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)  # the last bucket holds everything past the last bound
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float) -> None:
+        """
+        Adds a value to the histogram
+        :param value: the value in seconds
+        :return: None
+        """
+        self.buckets[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def get_quantile(self, quantile: float):
+        """
+        Returns the upper bound of the bucket holding the given quantile, capped at the largest value seen
+        :param quantile: the quantile between 0 and 1
+        :return: the value in seconds, or None if nothing was recorded
+        """
+        if self.count == 0:
+            return None
+        rank = quantile * self.count
+        seen = 0
+        for bucket, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count > 0:
+                if bucket == len(BUCKET_BOUNDS):
+                    return self.max
+                return min(BUCKET_BOUNDS[bucket], self.max)
+        return self.max
+
+    def get_summary(self) -> dict:
+        """
+        Returns the count, sum, minimum, maximum and quantiles of the histogram
+        :return: a dictionary of the summary
+        """
+        summary = {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max}
+        for quantile in QUANTILES:
+            summary[f"p{round(quantile * 100)}"] = self.get_quantile(quantile)
+        return summary
+
+
+class Metrics:
+    """
+    Metrics
+    This class holds the histograms and counters by name and exports them to a local file, as JSON or in the
+    Prometheus text format, every EXPORT_INTERVAL seconds and when the program exits.
+    """
+
+    def __init__(self, export_format=None, path=None) -> None:
+        """
+        Initializes the Metrics
+        :param export_format: "json" or "prometheus", or None to not export
+        :param path: the file to export to. The default file of the format if not given
+        """
+        if export_format is not None and export_format not in METRICS_PATHS:
+            raise ValueError(f"unknown metrics format {export_format}")
+        self.export_format = export_format
+        self.path = path if path is not None else METRICS_PATHS.get(export_format)
+        self.histograms = {}
+        self.counters = {}
+
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Records a latency
+        :param name: the name of the histogram
+        :param value: the latency in seconds
+        :return: None
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.record(value)
+
+    def count(self, name: str, amount=1) -> None:
+        """
+        Adds to a counter
+        :param name: the name of the counter
+        :param amount: the amount to add
+        :return: None
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def get_snapshot(self) -> dict:
+        """
+        Returns the summaries of every histogram and the value of every counter
+        :return: a dictionary with the "histograms" and "counters"
+        """
+        return {"histograms": {name: histogram.get_summary() for name, histogram in list(self.histograms.items())},
+                "counters": dict(self.counters)}
+
+    def to_prometheus(self) -> str:
+        """
+        Formats the metrics in the Prometheus text format, the histograms as summaries
+        :return: the text
+        """
+        snapshot = self.get_snapshot()
+        lines = []
+        for name, summary in sorted(snapshot["histograms"].items()):
+            lines.append(f"# TYPE {name}_seconds summary")
+            for quantile in QUANTILES:
+                lines.append(f'{name}_seconds{{quantile="{quantile}"}} {summary[f"p{round(quantile * 100)}"]}')
+            lines.append(f"{name}_seconds_sum {summary['sum']}")
+            lines.append(f"{name}_seconds_count {summary['count']}")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self) -> None:
+        """
+        Writes the metrics to the export file. The file is replaced in one step so it is never read half written.
+        :return: None
+        """
+        if self.export_format is None:
+            return
+        if self.export_format == "json":
+            text = json.dumps(self.get_snapshot(), indent=2)
+        else:
+            text = self.to_prometheus()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as metrics_file:
+            metrics_file.write(text)
+        os.replace(temp_path, self.path)
+
+    def start(self) -> None:
+        """
+        Starts exporting on a background thread, and once more when the program exits
+        :return: None
+        """
+        if self.thread is not None or self.export_format is None:
+            return
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def run(self) -> None:
+        """
+        Exports every EXPORT_INTERVAL seconds until stopped
+        :return: None
+        """
+        while not self.stopped.wait(EXPORT_INTERVAL):
+            self.export()
+
+    def stop(self) -> None:
+        """
+        Stops the background export and exports one last time
+        :return: None
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.export()
+
+
+# the metrics are switched on for the whole run when the game starts, so that when they are off the timed functions
+# are left as they are and cost nothing
+metrics = Metrics(os.environ[METRICS_ENV]) if os.environ.get(METRICS_ENV) else None
+if metrics is not None:
+    metrics.start()
+
+
+def timed(name: str):
+    """
+    This function returns a decorator that records the latency of each call of the decorated function in the
+    histogram of the given name and counts its calls and errors. When the metrics are off, the function is returned
+    unchanged.
+    :param name: the name of the histogram
+    :return: the decorator
+    """
+    def decorator(funct):
+        if metrics is None:
+            return funct
+
+        @functools.wraps(funct)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return funct(*args, **kwargs)
+            except BaseException:
+                metrics.count(f"{name}_errors")
+                raise
+            finally:
+                metrics.observe(name, perf_counter() - start)
+                metrics.count(f"{name}_calls")
+        return wrapper
+    return decorator
+
+
+def count(name: str, amount=1) -> None:
+    """
+    This function adds to a counter if the metrics are on
+    :param name: the name of the counter
+    :param amount: the amount to add
+    :return: None
+    """
+    if metrics is not None:
+        metrics.count(name, amount)
+
+
+if __name__ == '__main__':
+    demo = Metrics("prometheus", "./metrics_demo.prom")
+    for step in range(1000):
+        demo.observe("demo", step / 1e5)
+    demo.count("demo_events", 3)
+    print(demo.to_prometheus())
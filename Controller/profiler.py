@@ -0,0 +1,164 @@
+"""
+profiler.py
+This file contains the Profiler class that profiles the startup and the event handlers of the game.
+"""
+
+import cProfile
+import functools
+import pstats
+from contextlib import contextmanager
+from time import perf_counter
+
+PROFILE_ENV = "PUZZLE_PROFILE"  # set to anything to profile the game, like the --profile flag
+PROFILE_STATS_PATH = "./profile.pstats"
+PROFILE_COLLAPSED_PATH = "./profile.collapsed"
+MAX_STACK_DEPTH = 64
+
+
+def get_function_name(function: tuple) -> str:
+    """
+    This function formats a pstats function key as file:line(name)
+    :param function: the (file, line, name) key
+    :return: the name of the function
+    """
+    file, line, name = function
+    if file == "~":
+        return name
+    return f"{file}:{line}({name})"
+
+
+def get_collapsed_stacks(stats: pstats.Stats) -> dict:
+    """
+    This function turns profile statistics into collapsed stacks for flame graphs. cProfile only keeps the time of
+    each caller and callee pair, so the time of a function reached through several paths is split between them in
+    proportion to the time of each call edge.
+    :param stats: the profile statistics
+    :return: a dictionary of the number of microseconds by stack, the frames separated by semicolons
+    """
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_time) in callers.items():
+            callees.setdefault(caller, []).append((function, edge_time))
+
+    stacks = {}
+
+    def visit(function, stack, time):
+        total_time = stats.stats[function][3]
+        share = time / total_time if total_time > 0 else 0
+        own_time = round(stats.stats[function][2] * share * 1e6)
+        if own_time > 0:
+            key = ";".join(stack)
+            stacks[key] = stacks.get(key, 0) + own_time
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(function, []):
+            name = get_function_name(callee)
+            # recursion is folded into the first call so that every stack is finite
+            if name not in stack:
+                visit(callee, stack + [name], edge_time * share)
+
+    for function, (_, _, _, total_time, callers) in stats.stats.items():
+        if not callers:
+            visit(function, [get_function_name(function)], total_time)
+    return stacks
+
+
+class Profiler:
+    """
+    Profiler
+    This class runs cProfile during named phases of the game, such as the startup or a click, and keeps the wall
+    time of every phase. Phases can be nested; the profiler is only switched on and off by the outermost one. Phases
+    that wait for the player can be timed without being profiled.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the Profiler
+        """
+        self.profile = cProfile.Profile()
+        self.depth = 0
+        self.phases = {}  # name: [calls, total seconds, longest seconds], in order of first use
+
+    @contextmanager
+    def phase(self, name: str, profiled=True):
+        """
+        Profiles and times the with block as the given phase
+        :param name: the name of the phase
+        :param profiled: whether to profile the block. If not, a running profile is paused during it
+        :return: a context manager for the phase
+        """
+        outer_depth = self.depth
+        if profiled:
+            if outer_depth == 0:
+                self.profile.enable()
+            self.depth += 1
+        elif outer_depth > 0:
+            self.profile.disable()
+            self.depth = 0
+        start = perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = perf_counter() - start
+            phase = self.phases.setdefault(name, [0, 0.0, 0.0])
+            phase[0] += 1
+            phase[1] += elapsed
+            phase[2] = max(phase[2], elapsed)
+
+            if profiled and outer_depth == 0:
+                self.profile.disable()
+            elif not profiled and outer_depth > 0:
+                self.profile.enable()
+            self.depth = outer_depth
+
+    def wrap(self, name: str, funct, profiled=True):
+        """
+        Returns the function wrapped so that each call is a phase
+        :param name: the name of the phase
+        :param funct: the function
+        :param profiled: whether to profile the calls
+        :return: the wrapped function
+        """
+        @functools.wraps(funct)
+        def wrapper(*args, **kwargs):
+            with self.phase(name, profiled):
+                return funct(*args, **kwargs)
+        return wrapper
+
+    def instrument(self, cls, method: str, name: str, profiled=True) -> None:
+        """
+        Replaces a method of a class by its wrapped version, so that every call of it is a phase
+        :param cls: the class
+        :param method: the name of the method
+        :param name: the name of the phase
+        :param profiled: whether to profile the calls
+        :return: None
+        """
+        setattr(cls, method, self.wrap(name, getattr(cls, method), profiled))
+
+    def write(self, stats_path=PROFILE_STATS_PATH, collapsed_path=PROFILE_COLLAPSED_PATH) -> None:
+        """
+        Writes the profile as a pstats file and as collapsed stacks
+        :param stats_path: the path of the pstats file
+        :param collapsed_path: the path of the collapsed stack file
+        :return: None
+        """
+        self.profile.create_stats()
+        if not self.profile.stats:
+            return
+        self.profile.dump_stats(stats_path)
+        stacks = get_collapsed_stacks(pstats.Stats(self.profile))
+        with open(collapsed_path, mode="w", encoding="utf-8") as collapsed_file:
+            for stack, time in sorted(stacks.items()):
+                collapsed_file.write(f"{stack} {time}\n")
+
+    def get_summary(self) -> str:
+        """
+        Returns the wall time of every phase as a table
+        :return: the table
+        """
+        lines = [f"{'phase':<24}{'calls':>8}{'total ms':>12}{'mean ms':>12}{'max ms':>12}"]
+        for name, (calls, total, longest) in self.phases.items():
+            mean = total / calls
+            lines.append(f"{name:<24}{calls:>8}{total * 1e3:>12.2f}{mean * 1e3:>12.2f}{longest * 1e3:>12.2f}")
+        return "\n".join(lines)
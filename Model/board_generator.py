@@ -0,0 +1,110 @@
+"""
+board_generator.py
+This file contains the functions that generate uniformly random solvable puzzles without rejecting shuffles.
+"""
+
+from random import Random
+from Model.puzzle_validater import is_solvable, are_solvable
+from Model.board_state import get_typecode
+
+
+def make_solvable(tiles: list[int]) -> None:
+    """
+    This function makes the given board solvable in place. Swapping the first two tiles that are not the blank flips
+    the parity of the inversion count without moving the blank, so it pairs every unsolvable board with exactly one
+    solvable board. Applying it to a uniform shuffle therefore gives a uniform solvable board.
+    :param tiles: the board to fix
+    :return: None
+    """
+    if is_solvable(tiles):
+        return
+    blank = len(tiles)
+    first = 1 if tiles[0] == blank else 0
+    second = 2 if blank in (tiles[0], tiles[1]) else 1
+    tiles[first], tiles[second] = tiles[second], tiles[first]
+
+
+def generate_board(num_of_tiles: int, rng=None) -> list[int]:
+    """
+    This function returns a uniformly random solvable board
+    :param num_of_tiles: the number of tiles of the board
+    :param rng: the random.Random instance to draw from. A new unseeded one is used if none is given
+    :return: the list of integers representing the board
+    """
+    if rng is None:
+        rng = Random()
+    tiles = list(range(1, num_of_tiles + 1))
+    rng.shuffle(tiles)
+    if num_of_tiles > 2:
+        make_solvable(tiles)
+    return tiles
+
+
+def generate_boards(num_of_tiles: int, count: int, seed=None):
+    """
+    This generator yields uniformly random solvable boards one at a time. The same seed always gives the same boards.
+    :param num_of_tiles: the number of tiles of each board
+    :param count: the number of boards to generate
+    :param seed: the seed of the random number generator
+    :return: a generator of lists of integers representing the boards
+    """
+    rng = Random(seed)
+    for _ in range(count):
+        yield generate_board(num_of_tiles, rng)
+
+
+def generate_board_array(num_of_tiles: int, count: int, seed=None):
+    """
+    This function returns many uniformly random solvable boards at once as the rows of a 2-D NumPy array. The same
+    seed always gives the same boards.
+    :param num_of_tiles: the number of tiles of each board
+    :param count: the number of boards to generate
+    :param seed: the seed of the random number generator
+    :return: a NumPy array of shape (count, num_of_tiles)
+    """
+    # numpy is only needed to generate boards in batches, so it is imported here
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("numpy is required to generate boards in batches") from None
+
+    rng = np.random.default_rng(seed)
+    boards = np.tile(np.arange(1, num_of_tiles + 1, dtype=get_typecode(num_of_tiles)), (count, 1))
+    boards = rng.permuted(boards, axis=1)
+    if num_of_tiles <= 2:
+        return boards
+
+    # fix the unsolvable boards the same way make_solvable does
+    rows = np.flatnonzero(~are_solvable(boards))
+    blank_first = boards[rows, 0] == num_of_tiles
+    first = np.where(blank_first, 1, 0)
+    second = np.where(blank_first | (boards[rows, 1] == num_of_tiles), 2, 1)
+    boards[rows, first], boards[rows, second] = boards[rows, second], boards[rows, first]
+    return boards
+
+
+def generate_board_chunks(num_of_tiles: int, count: int, seed=None, chunk_size=1_000_000):
+    """
+    This generator yields the boards of generate_board_array in chunks so that huge pools can be streamed with
+    bounded memory.
+    :param num_of_tiles: the number of tiles of each board
+    :param count: the total number of boards to generate
+    :param seed: the seed of the random number generator
+    :param chunk_size: the largest number of boards per chunk
+    :return: a generator of NumPy arrays of shape (chunk, num_of_tiles)
+    """
+    # numpy is only needed to generate boards in batches, so it is imported here
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("numpy is required to generate boards in batches") from None
+
+    # every chunk draws from its own child seed so the whole stream only depends on the given seed
+    seeds = np.random.SeedSequence(seed)
+    for start in range(0, count, chunk_size):
+        yield generate_board_array(num_of_tiles, min(chunk_size, count - start), seeds.spawn(1)[0])
+
+
+if __name__ == '__main__':
+    for board in generate_boards(16, 3, seed=1):
+        print(board)
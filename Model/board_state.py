@@ -0,0 +1,211 @@
+"""
+board_state.py
+This file contains the compact board representations used by the Model to store the tiles of a puzzle.
+"""
+
+from array import array
+
+PACKED_MAX_TILES = 16  # boards up to this size fit in one 64-bit integer
+BITS_PER_TILE = 4
+TILE_MASK = (1 << BITS_PER_TILE) - 1
+
+
+class PackedBoard:
+    """
+    PackedBoard
+    This class stores a board of up to 16 tiles in a single integer with 4 bits per position. The nibble of a position
+    holds the tile number minus one. Swapping two tiles, hashing and comparing are all O(1).
+    """
+
+    __slots__ = ("value", "size")
+
+    def __init__(self, tiles=(), value=0, size=0) -> None:
+        """
+        Initializes the board from a sequence of tiles, or directly from an already packed value
+        :param tiles: the tiles numbered 1 to n in board order
+        :param value: the packed value, used when no tiles are given
+        :param size: the number of tiles of the packed value, used when no tiles are given
+        """
+        if tiles:
+            if len(tiles) > PACKED_MAX_TILES:
+                raise ValueError(f"a packed board holds at most {PACKED_MAX_TILES} tiles")
+            value = 0
+            for pos, tile in enumerate(tiles):
+                value |= (tile - 1) << (BITS_PER_TILE * pos)
+            size = len(tiles)
+        self.value = value
+        self.size = size
+
+    def __getitem__(self, pos: int) -> int:
+        if not 0 <= pos < self.size:
+            raise IndexError("board position out of range")
+        return (self.value >> (BITS_PER_TILE * pos) & TILE_MASK) + 1
+
+    def __setitem__(self, pos: int, tile: int) -> None:
+        if not 0 <= pos < self.size:
+            raise IndexError("board position out of range")
+        shift = BITS_PER_TILE * pos
+        self.value = self.value & ~(TILE_MASK << shift) | (tile - 1) << shift
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        value = self.value
+        for _ in range(self.size):
+            yield (value & TILE_MASK) + 1
+            value >>= BITS_PER_TILE
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PackedBoard):
+            return self.size == other.size and self.value == other.value
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.size, self.value))
+
+    def __repr__(self) -> str:
+        return f"PackedBoard({self.to_list()})"
+
+    def swap(self, pos_1: int, pos_2: int) -> None:
+        """
+        Swaps the tiles at the two positions
+        :param pos_1: the first position
+        :param pos_2: the second position
+        :return: None
+        """
+        shift_1 = BITS_PER_TILE * pos_1
+        shift_2 = BITS_PER_TILE * pos_2
+        difference = (self.value >> shift_1 ^ self.value >> shift_2) & TILE_MASK
+        self.value ^= difference << shift_1 | difference << shift_2
+
+    def index(self, tile: int) -> int:
+        """
+        Returns the position of the given tile
+        :param tile: the tile to look for
+        :return: the position of the tile
+        """
+        value = self.value
+        for pos in range(self.size):
+            if (value & TILE_MASK) + 1 == tile:
+                return pos
+            value >>= BITS_PER_TILE
+        raise ValueError(f"{tile} is not on the board")
+
+    def copy(self):
+        """
+        Returns a copy of the board
+        :return: a copy of the board
+        """
+        return PackedBoard(value=self.value, size=self.size)
+
+    def to_list(self) -> list[int]:
+        """
+        Returns the tiles of the board as a list
+        :return: the list of integers representing the board
+        """
+        return list(self)
+
+
+class ArrayBoard:
+    """
+    ArrayBoard
+    This class stores a board of more than 16 tiles in a typed array, one byte per tile while the tile numbers fit
+    and wider items for bigger boards.
+    """
+
+    __slots__ = ("tiles",)
+
+    def __init__(self, tiles=()) -> None:
+        """
+        Initializes the board from a sequence of tiles
+        :param tiles: the tiles numbered 1 to n in board order
+        """
+        self.tiles = array(get_typecode(len(tiles)), tiles)
+
+    def __getitem__(self, pos: int) -> int:
+        return self.tiles[pos]
+
+    def __setitem__(self, pos: int, tile: int) -> None:
+        self.tiles[pos] = tile
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def __iter__(self):
+        return iter(self.tiles)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ArrayBoard):
+            return self.tiles == other.tiles
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.tiles.tobytes())
+
+    def __repr__(self) -> str:
+        return f"ArrayBoard({self.to_list()})"
+
+    def swap(self, pos_1: int, pos_2: int) -> None:
+        """
+        Swaps the tiles at the two positions
+        :param pos_1: the first position
+        :param pos_2: the second position
+        :return: None
+        """
+        self.tiles[pos_1], self.tiles[pos_2] = self.tiles[pos_2], self.tiles[pos_1]
+
+    def index(self, tile: int) -> int:
+        """
+        Returns the position of the given tile
+        :param tile: the tile to look for
+        :return: the position of the tile
+        """
+        return self.tiles.index(tile)
+
+    def copy(self):
+        """
+        Returns a copy of the board
+        :return: a copy of the board
+        """
+        board = ArrayBoard.__new__(ArrayBoard)
+        board.tiles = self.tiles[:]
+        return board
+
+    def to_list(self) -> list[int]:
+        """
+        Returns the tiles of the board as a list
+        :return: the list of integers representing the board
+        """
+        return self.tiles.tolist()
+
+
+def get_typecode(num_of_tiles: int) -> str:
+    """
+    Returns the smallest array typecode able to hold the numbers 0 to num_of_tiles
+    :param num_of_tiles: the number of tiles of the board
+    :return: the array typecode
+    """
+    if num_of_tiles <= 0xFF:
+        return 'B'
+    if num_of_tiles <= 0xFFFF:
+        return 'H'
+    return 'I'
+
+
+def make_board(tiles):
+    """
+    Returns the most compact board representation for the given tiles
+    :param tiles: the tiles numbered 1 to n in board order
+    :return: a PackedBoard for boards up to 16 tiles, an ArrayBoard otherwise
+    """
+    if len(tiles) <= PACKED_MAX_TILES:
+        return PackedBoard(tiles)
+    return ArrayBoard(tiles)
+
+
+if __name__ == '__main__':
+    board = make_board([1, 2, 3, 4, 5, 6, 7, 9, 8])
+    print(board)
+    board.swap(7, 8)
+    print(board, board == make_board(list(range(1, 10))))
@@ -0,0 +1,247 @@
+"""
+distance_database.py
+This file contains the table of the exact number of moves left from every board of the 9 tile puzzles, indexed by
+permutation rank, and the offline builder of its binary file.
+"""
+
+import mmap
+import os
+from math import factorial
+from time import perf_counter
+from Model.pattern_database import get_neighbours
+from Model.puzzle_validater import is_solvable
+from Model.ranking import rank, unrank
+
+DATABASE_PATH = "./Model/eight.ddb"  # binary file holding the table for the 3x3 board
+MAGIC = b"DDB1"
+UNREACHED = 0xFF
+
+
+def get_size(num_of_tiles: int) -> int:
+    """
+    Returns the number of solvable boards, which is the size of the table
+    :param num_of_tiles: the number of tiles of the board
+    :return: num_of_tiles! / 2
+    """
+    return factorial(num_of_tiles) // 2
+
+
+def get_index(tiles) -> int:
+    """
+    This function numbers the solvable boards densely. A board is the position of the blank followed by the order of
+    the other tiles; on a solvable board the order of the last two tiles follows from the parity of the others, so
+    only the first ones are ranked.
+    :param tiles: the board, which must be solvable
+    :return: the index of the board, from 0 up to get_size(len(tiles)) - 1
+    """
+    num_of_tiles = len(tiles)
+    others = [tile - 1 for tile in tiles if tile != num_of_tiles]
+    return tiles.index(num_of_tiles) * (factorial(num_of_tiles - 1) // 2) + rank(others[:-2], num_of_tiles - 1)
+
+
+def get_board(index: int, num_of_tiles: int) -> list[int]:
+    """
+    This function is the inverse of get_index
+    :param index: the index of the board
+    :param num_of_tiles: the number of tiles of the board
+    :return: the solvable board
+    """
+    blank, rest = divmod(index, factorial(num_of_tiles - 1) // 2)
+    others = unrank(rest, num_of_tiles - 3, num_of_tiles - 1)
+    last = sorted(set(range(num_of_tiles - 1)).difference(others))
+    for ending in (last, last[::-1]):
+        tiles = [value + 1 for value in others + ending]
+        tiles.insert(blank, num_of_tiles)
+        if is_solvable(tiles):
+            return tiles
+    raise ValueError(f"{index} is not the index of a board of {num_of_tiles} tiles")
+
+
+def build_distance_table(length: int) -> bytearray:
+    """
+    This function computes the number of moves left from every solvable board with a breadth-first search from the
+    solved board
+    :param length: the number of tiles in a row of the board
+    :return: the table, one byte per board indexed by get_index
+    """
+    num_of_tiles = length * length
+    neighbours = get_neighbours(length)
+    table = bytearray([UNREACHED]) * get_size(num_of_tiles)
+
+    goal = list(range(1, num_of_tiles + 1))
+    table[get_index(goal)] = 0
+    frontier = [(goal, num_of_tiles - 1)]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for tiles, blank in frontier:
+            for pos in neighbours[blank]:
+                board = tiles.copy()
+                board[blank], board[pos] = board[pos], num_of_tiles
+                index = get_index(board)
+                if table[index] == UNREACHED:
+                    table[index] = depth
+                    next_frontier.append((board, pos))
+        frontier = next_frontier
+    return table
+
+
+def build_database(path=DATABASE_PATH, length=3) -> None:
+    """
+    This function builds the table of a board size and writes it to a binary file, a small header followed by the
+    raw table
+    :param path: the path of the binary file
+    :param length: the number of tiles in a row of the board
+    :return: None
+    """
+    start = perf_counter()
+    table = build_distance_table(length)
+    with open(path, mode="wb") as database_file:
+        database_file.write(MAGIC + bytes([length]))
+        database_file.write(table)
+    print(f"{len(table)} boards of {length}x{length} built in {perf_counter() - start:.1f}s, the farthest is "
+          f"{max(table)} moves away")
+
+
+class DistanceDatabase:
+    """
+    DistanceDatabase
+    This class gives the exact number of moves left from any solvable board of its size, memory-mapped from the
+    binary file so each lookup is one byte read after ranking the board. The next optimal move is the neighbour one
+    move closer, so hints and solutions take a few lookups and no search.
+    It is also a heuristic for the Solver, a perfect one, which leads the search straight to the solution.
+    """
+
+    def __init__(self, path=DATABASE_PATH) -> None:
+        """
+        Initializes the database by memory-mapping the given file
+        :param path: the path of the binary file made by build_database
+        """
+        with open(path, mode="rb") as database_file:
+            self.table = mmap.mmap(database_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.table[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a distance database")
+        self.length = self.table[len(MAGIC)]
+        self.num_of_tiles = self.length * self.length
+        self.offset = len(MAGIC) + 1
+        if len(self.table) != self.offset + get_size(self.num_of_tiles):
+            raise ValueError(f"{path} is truncated")
+        self.neighbours = get_neighbours(self.length)
+
+    def check_board(self, tiles) -> None:
+        """
+        Checks that a board can be looked up
+        :param tiles: the board
+        :return: None
+        """
+        if len(tiles) != self.num_of_tiles:
+            raise ValueError(f"the distance database is for boards of {self.num_of_tiles} tiles")
+        if not is_solvable(tiles):
+            raise ValueError("puzzle is not solvable")
+
+    def get_distance(self, tiles) -> int:
+        """
+        Returns the number of moves of the optimal solution, which is also the difficulty of the board
+        :param tiles: the board
+        :return: the number of moves left
+        """
+        self.check_board(tiles)
+        return self.table[self.offset + get_index(tiles)]
+
+    def get_next_move(self, tiles):
+        """
+        Returns a tile whose move starts an optimal solution
+        :param tiles: the board
+        :return: the tile to move, or None if the board is solved
+        """
+        self.check_board(tiles)
+        return self.find_next_move(list(tiles))
+
+    def get_solution(self, tiles) -> list[int]:
+        """
+        Returns an optimal solution by following the next move until the board is solved
+        :param tiles: the board
+        :return: the list of tiles to move, in order
+        """
+        self.check_board(tiles)
+        tiles = list(tiles)
+        path = []
+        tile = self.find_next_move(tiles)
+        while tile is not None:
+            blank = tiles.index(self.num_of_tiles)
+            pos = tiles.index(tile)
+            tiles[blank], tiles[pos] = tile, self.num_of_tiles
+            path.append(tile)
+            tile = self.find_next_move(tiles)
+        return path
+
+    def find_next_move(self, tiles: list[int]):
+        """
+        Returns the tile next to the blank whose move brings the board one move closer to being solved
+        :param tiles: the board, which must be solvable
+        :return: the tile to move, or None if the board is solved
+        """
+        table = self.table
+        offset = self.offset
+        distance = table[offset + get_index(tiles)]
+        if distance == 0:
+            return None
+        blank = tiles.index(self.num_of_tiles)
+        for pos in self.neighbours[blank]:
+            tile = tiles[pos]
+            tiles[blank], tiles[pos] = tile, self.num_of_tiles
+            closer = table[offset + get_index(tiles)] < distance
+            tiles[blank], tiles[pos] = self.num_of_tiles, tile
+            if closer:
+                return tile
+        raise ValueError("the distance database is corrupt")
+
+    def get_heuristic(self):
+        """
+        Returns the heuristic for a search. The lookups keep no state between moves, so the database is its own
+        heuristic and can serve any number of searches at once.
+        :return: the DistanceDatabase instance
+        """
+        return self
+
+    def reset(self, tiles: list[int]) -> int:
+        """
+        Evaluates the whole board, as a heuristic for the Solver
+        :param tiles: the board
+        :return: the number of moves left
+        """
+        if len(tiles) != self.num_of_tiles:
+            raise ValueError(f"the distance database is for boards of {self.num_of_tiles} tiles")
+        return self.table[self.offset + get_index(tiles)]
+
+    def move(self, tiles: list[int], tile: int, src: int, dst: int) -> int:
+        """
+        Evaluates the board after a tile has been moved from src to dst, as a heuristic for the Solver
+        :param tiles: the board after the move
+        :param tile: the tile that was moved
+        :param src: the position the tile left
+        :param dst: the position the tile moved to
+        :return: the number of moves left
+        """
+        return self.table[self.offset + get_index(tiles)]
+
+
+def load_distance_database(num_of_tiles: int, path=DATABASE_PATH):
+    """
+    Returns the distance database if a database file for the board size has been built
+    :param num_of_tiles: the number of tiles of the board
+    :param path: the path of the binary file
+    :return: the DistanceDatabase instance or None if there is no usable database
+    """
+    if not os.path.exists(path):
+        return None
+    database = DistanceDatabase(path)
+    if database.num_of_tiles != num_of_tiles:
+        return None
+    return database
+
+
+if __name__ == '__main__':
+    build_database()
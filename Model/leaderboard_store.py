@@ -0,0 +1,141 @@
+"""
+leaderboard_store.py
+This file contains the LeaderboardStore class that keeps every leaderboard entry in a local SQLite database.
+"""
+
+import sqlite3
+
+LEADERBOARD_DB_PATH = "./leaderboard.db"
+BUSY_TIMEOUT = 5  # seconds a writer waits for another game to finish writing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    puzzle TEXT NOT NULL,
+    player TEXT NOT NULL,
+    moves INTEGER NOT NULL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_rank ON entries (puzzle, moves, time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def parse_legacy_line(line: str):
+    """
+    This function parses one line of the old leaderboard.txt format: puzzle name, player name, moves and time
+    :param line: the line of the file
+    :return: a tuple (puzzle, player, moves, time), or None if the line is malformed
+    """
+    fields = line.split()
+    if len(fields) != 4:
+        return None
+    try:
+        return fields[0], fields[1], int(fields[2]), float(fields[3])
+    except ValueError:
+        return None
+
+
+class LeaderboardStore:
+    """
+    LeaderboardStore
+    This class stores every recorded score in a SQLite database. Each score is appended in its own transaction, so a
+    win costs one indexed insert however large the store is, a crash never leaves it half written, and several games
+    can record scores at the same time. The scores are indexed by puzzle, moves and time so the best scores of a
+    puzzle are read without scanning the others. An old leaderboard.txt is imported the first time the store is
+    opened.
+    """
+
+    def __init__(self, path=LEADERBOARD_DB_PATH, legacy_path=None) -> None:
+        """
+        Initializes the LeaderboardStore, creating the database if needed
+        :param path: the path of the database file
+        :param legacy_path: the path of a leaderboard.txt file to import if it has not been imported yet
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        # the write-ahead log lets readers continue while another game writes, and commits without rewriting pages
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        if legacy_path is not None:
+            self.import_legacy(legacy_path)
+
+    def import_legacy(self, legacy_path: str) -> int:
+        """
+        Imports the entries of a leaderboard.txt file once. The import is marked done in the same transaction, so
+        two games starting at the same time cannot both import it.
+        :param legacy_path: the path of the leaderboard.txt file
+        :return: the number of entries imported
+        """
+        try:
+            with open(legacy_path, mode="r", encoding="utf-8") as legacy_file:
+                rows = [row for row in map(parse_legacy_line, legacy_file) if row is not None]
+        except FileNotFoundError:
+            return 0
+
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if cursor.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone() is not None:
+                cursor.execute("ROLLBACK")
+                return 0
+            cursor.executemany("INSERT INTO entries (puzzle, player, moves, time) VALUES (?, ?, ?, ?)", rows)
+            cursor.execute("INSERT INTO meta (key, value) VALUES ('imported', ?)", (legacy_path,))
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def add(self, puzzle: str, player: str, moves: int, time: float) -> None:
+        """
+        Appends a score in its own transaction
+        :param puzzle: the name of the puzzle
+        :param player: the name of the player
+        :param moves: the number of moves made to win
+        :param time: the number of seconds taken to win
+        :return: None
+        """
+        self.connection.execute("INSERT INTO entries (puzzle, player, moves, time) VALUES (?, ?, ?, ?)",
+                                (puzzle, player, moves, time))
+
+    def get_top(self, puzzle: str, count: int) -> list:
+        """
+        Returns the best scores of a puzzle, fewest moves first and then shortest time
+        :param puzzle: the name of the puzzle
+        :param count: the maximum number of scores
+        :return: a list of [player, moves, time] lists
+        """
+        rows = self.connection.execute("SELECT player, moves, time FROM entries WHERE puzzle = ? "
+                                       "ORDER BY moves, time, id LIMIT ?", (puzzle, count))
+        return [list(row) for row in rows]
+
+    def get_all_top(self, count: int) -> dict:
+        """
+        Returns the best scores of every puzzle
+        :param count: the maximum number of scores per puzzle
+        :return: a dictionary of the lists of [player, moves, time] lists by puzzle name
+        """
+        # walks the index from one puzzle name to the next instead of reading every entry
+        puzzles = [row[0] for row in self.connection.execute(
+            "WITH RECURSIVE names(puzzle) AS (SELECT MIN(puzzle) FROM entries UNION ALL "
+            "SELECT (SELECT MIN(puzzle) FROM entries WHERE puzzle > names.puzzle) FROM names "
+            "WHERE names.puzzle IS NOT NULL) SELECT puzzle FROM names WHERE puzzle IS NOT NULL")]
+        return {puzzle: self.get_top(puzzle, count) for puzzle in puzzles}
+
+    def close(self) -> None:
+        """
+        Closes the database
+        :return: None
+        """
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    store = LeaderboardStore(legacy_path="./leaderboard.txt")
+    print(store.get_all_top(10))
+    store.close()
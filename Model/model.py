@@ -3,10 +3,20 @@ model.py
 This file contains the logic for the fifteen puzzle game.
 """
 
-from random import shuffle
-from math import sqrt
+import struct
+import sys
+from itertools import islice
+from random import Random
+from math import isqrt
 from datetime import datetime
-from Model.puzzle_validater import is_solvable
+from Model.board_generator import generate_board
+from Model.board_state import make_board, get_typecode
+from Model.move_history import MoveHistory, UP, DOWN, LEFT, RIGHT, get_direction, get_offset, get_opposite, \
+    get_checkpoint_interval
+from array import array
+
+BINARY_MAGIC = b"PZB1"
+BINARY_CHUNK_TILES = 64 * 1024  # tiles read or written at once by the binary serialization
 
 
 class Model:
@@ -18,21 +28,36 @@ class Model:
 
     # data schema for storing tile location [space: tile (location)]
 
-    def __init__(self, num_of_tiles: int) -> None:
+    def __init__(self, num_of_tiles: int, seed=None, tiles=None) -> None:
         """
         __init__
         Initializes the Model class with the given number of tiles
         :param num_of_tiles: The number of tiles in the game in perfect integer squared values
+        :param seed: The seed used to shuffle the boards so that games can be reproduced. Random if not given
+        :param tiles: the board to start from instead of a shuffled one, used to load saved boards
         """
 
         self.validate(num_of_tiles)
 
-        self.tiles = []
+        self.tiles = make_board([])
         self.num_of_tiles = num_of_tiles
 
+        # positions[tile] is the current position of the tile, the blank is the tile numbered num_of_tiles
+        self.positions = array(get_typecode(num_of_tiles))
+        self.blank = 0
+        self.misplaced = 0
+        self.history = None
+        self.recorder = None  # records every move of the game when set, see ReplayRecorder
+
         # length X length = number of tiles
-        self.length = int(sqrt(self.num_of_tiles))
-        self.create_board()
+        self.length = isqrt(self.num_of_tiles)
+        # the direction the blank moves in by the change of its position
+        self.directions = {offset: get_direction(offset, self.length) for offset in (-self.length, self.length, -1, 1)}
+        self.random = Random(seed)
+        if tiles is None:
+            self.create_board()
+        else:
+            self.set_puzzle(tiles)
         self.play_count = 0
         self.time = 0
 
@@ -46,11 +71,8 @@ class Model:
         if num_of_tiles < 1:
             raise ValueError("size of board cannot be less than 1")
 
-        quotient_1 = int(sqrt(num_of_tiles))
-        quotient_2 = int(num_of_tiles / quotient_1)
-
-        # must be equal to be a perfect square
-        if quotient_1 != quotient_2:
+        # the integer square root is exact, unlike a float square root on very large boards
+        if isqrt(num_of_tiles) ** 2 != num_of_tiles:
             raise ValueError("size of board must be a perfect squared value")
 
 
@@ -60,13 +82,23 @@ class Model:
         :param puzzle: The puzzle list to be set.
         :return: None
         """
-        self.tiles = puzzle
+        self.tiles = make_board(puzzle)
+        self.track_tiles()
+        self.history = MoveHistory(self.get_state(), checkpoint_interval=get_checkpoint_interval(self.num_of_tiles))
 
     def get_puzzle(self) -> list[int]:
         """
         This function returns a copy of the list of integers representing the puzzle.
         :return: a copy of the list of integers representing the puzzle
         """
+        return self.tiles.to_list()
+
+    def get_state(self):
+        """
+        This function returns a copy of the compact board representing the puzzle. Unlike the list returned by
+        get_puzzle, it is hashable and can be compared in constant time.
+        :return: a copy of the compact board representing the puzzle
+        """
         return self.tiles.copy()
 
     def create_board(self) -> None:
@@ -75,76 +107,307 @@ class Model:
         :return: None
         """
 
-        # A puzzle is numbered 1 to n where n is a perfect square
-        self.tiles = list(range(1, self.num_of_tiles + 1))
-        shuffle(self.tiles)
+        # A puzzle is numbered 1 to n where n is a perfect square. The shuffle is fixed up to be solvable instead of
+        # being repeated until it is
+        self.tiles = make_board(generate_board(self.num_of_tiles, self.random))
+        self.track_tiles()
+        self.history = MoveHistory(self.get_state(), checkpoint_interval=get_checkpoint_interval(self.num_of_tiles))
 
-        # keep shuffling until the list is solvable
-        while not is_solvable(self.tiles) and not self.is_done():
-            shuffle(self.tiles)
+    def track_tiles(self) -> None:
+        """
+        This function rebuilds the position of every tile, the blank position and the number of misplaced tiles from
+        the current board. They are then kept up to date by move_tile so no move needs to scan the board.
+        :return: None
+        """
+        self.positions = array(get_typecode(self.num_of_tiles), [0]) * (self.num_of_tiles + 1)
+        self.misplaced = 0
+        for pos, tile in enumerate(self.tiles):
+            self.positions[tile] = pos
+            if tile != pos + 1:
+                self.misplaced += 1
+        self.blank = self.positions[self.num_of_tiles]
 
     def is_done(self):
         """
         Checks if the puzzle is solved
         :return: True if the puzzle is solved. False otherwise
         """
-        for i in range(1, len(self.tiles) + 1):
-            # need to check with -1 offset because the tiles are numbered 1 to n
-            if self.tiles[i - 1] != i:
-                return False
-        return True
+        return self.misplaced == 0
 
     # need to expand to count combination moves
     def get_moves(self) -> list[int]:
-        # retrieve the space where the space it
-        blank_space = self.tiles.index(self.num_of_tiles)
-
-        # get the possible locations without restrictions to board dimensions
-
-        possible_pos = [blank_space + 1, blank_space - 1, blank_space + self.length, blank_space - self.length]
+        # the blank position is tracked so only its neighbours need to be looked at
+        blank_space = self.blank
+        row, col = divmod(blank_space, self.length)
 
-        # filter illegal moves and retrieve the corresponding tile in that current position
+        # retrieve the tiles on the right, left, below and above the space that are within the board
         movable_tiles = []
-        for pos in possible_pos:
-            if 0 <= pos <= self.num_of_tiles - 1:
-                if pos // self.length == blank_space // self.length:
-                    movable_tiles.append(self.tiles[pos])
-                if pos % self.length == blank_space % self.length:
-                    movable_tiles.append(self.tiles[pos])
+        if col < self.length - 1:
+            movable_tiles.append(self.tiles[blank_space + 1])
+        if col > 0:
+            movable_tiles.append(self.tiles[blank_space - 1])
+        if row < self.length - 1:
+            movable_tiles.append(self.tiles[blank_space + self.length])
+        if row > 0:
+            movable_tiles.append(self.tiles[blank_space - self.length])
 
         return movable_tiles
 
     def move_tile(self, tile: int) -> bool:
-        if tile in self.get_moves():
+        if not 1 <= tile < self.num_of_tiles:
+            return False
+        tile_pos = self.positions[tile]
+        space_pose = self.blank
+
+        # the tile can move if it is directly above or below the space or beside it on the same row
+        distance = abs(tile_pos - space_pose)
+        if distance == self.length or (distance == 1 and tile_pos // self.length == space_pose // self.length):
+            # keep the count of misplaced tiles up to date for the tile and the blank that switch places
+            self.misplaced += (space_pose != tile - 1) - (tile_pos != tile - 1)
+            self.misplaced += (tile_pos != self.num_of_tiles - 1) - (space_pose != self.num_of_tiles - 1)
+
             # switch the positions
-            tile_pos = self.tiles.index(tile)
-            space_pose = self.tiles.index(self.num_of_tiles)
+            self.tiles.swap(space_pose, tile_pos)
+            self.positions[tile] = space_pose
+            self.positions[self.num_of_tiles] = tile_pos
+            self.blank = tile_pos
+            direction = self.directions[tile_pos - space_pose]
+            self.history.push(direction, self.get_state)
+            if self.recorder is not None:
+                self.recorder.record(direction)
 
-            self.tiles[space_pose], self.tiles[tile_pos] = tile, self.num_of_tiles
             self.play_count += 1
-
             if self.play_count == 1:
                 self.start_timer()
             return True
         return False
 
+    def slide(self, tile_pos: int) -> int:
+        """
+        This function switches the blank with the tile at the given position, which must be next to it. It is used
+        to undo, redo and replay moves; move_tile does the same inline since it is the hot path
+        :param tile_pos: the position of the tile
+        :return: the tile that was moved
+        """
+        space_pose = self.blank
+        tile = self.tiles[tile_pos]
+
+        # keep the count of misplaced tiles up to date for the tile and the blank that switch places
+        self.misplaced += (space_pose != tile - 1) - (tile_pos != tile - 1)
+        self.misplaced += (tile_pos != self.num_of_tiles - 1) - (space_pose != self.num_of_tiles - 1)
+
+        # switch the positions
+        self.tiles.swap(space_pose, tile_pos)
+        self.positions[tile] = space_pose
+        self.positions[self.num_of_tiles] = tile_pos
+        self.blank = tile_pos
+        return tile
+
+    def count_move(self) -> None:
+        """
+        This function counts a move of the player and starts the timer on the first one
+        :return: None
+        """
+        self.play_count += 1
+        if self.play_count == 1:
+            self.start_timer()
+
+    def undo(self):
+        """
+        This function moves back the tile of the last move. Undoing is a move of its own, so it is counted.
+        :return: the tile that was moved, or None if there is no move to undo
+        """
+        direction = self.history.undo()
+        if direction is None:
+            return None
+        tile = self.slide(self.blank + get_offset(get_opposite(direction), self.length))
+        if self.recorder is not None:
+            self.recorder.record(get_opposite(direction))
+        self.count_move()
+        return tile
+
+    def redo(self):
+        """
+        This function makes the last undone move again. It is counted as a move.
+        :return: the tile that was moved, or None if there is no move to redo
+        """
+        direction = self.history.redo()
+        if direction is None:
+            return None
+        tile = self.slide(self.blank + get_offset(direction, self.length))
+        if self.recorder is not None:
+            self.recorder.record(direction)
+        self.count_move()
+        return tile
+
+    def go_to_move(self, move: int) -> None:
+        """
+        This function sets the board to how it was after the given move of the history, starting from the closest
+        checkpoint. The moves after it can still be redone. It is meant for reviewing a game, so the play count is
+        not changed.
+        :param move: the number of the move
+        :return: None
+        """
+        board, directions = self.history.seek(move)
+        self.tiles = board.copy()
+        self.track_tiles()
+        for direction in directions:
+            self.slide(self.blank + get_offset(direction, self.length))
+
+    def play_directions(self, directions) -> None:
+        """
+        This function plays a sequence of moves given as the directions the blank moves in, as stored in replays. It
+        works on a plain list and only rebuilds the tracking at the end, so it plays millions of moves per second.
+        The moves are added to the history a checkpoint interval at a time, so they can be undone like any other.
+        If a move would take the blank off the board, a ValueError is raised and the moves before it stay played.
+        :param directions: an iterable of the directions
+        :return: None
+        """
+        directions = list(directions)
+        tiles = self.tiles.to_list()
+        blank = self.blank
+        length = self.length
+        last_row = self.num_of_tiles - length
+        up, down, left, right = (get_offset(direction, length) for direction in (UP, DOWN, LEFT, RIGHT))
+        history = self.history
+        checkpoint = history.get_moves_to_checkpoint()
+        recorded = 0
+        count = 0
+
+        def get_board():
+            # the list is only updated behind the blank, so the blank is put back in the copy
+            board = tiles.copy()
+            board[blank] = self.num_of_tiles
+            return make_board(board)
+
+        try:
+            for direction in directions:
+                if direction == UP:
+                    if blank < length:
+                        raise ValueError(f"move {count} takes the blank off the top of the board")
+                    target = blank + up
+                elif direction == DOWN:
+                    if blank >= last_row:
+                        raise ValueError(f"move {count} takes the blank off the bottom of the board")
+                    target = blank + down
+                elif direction == LEFT:
+                    if blank % length == 0:
+                        raise ValueError(f"move {count} takes the blank off the left of the board")
+                    target = blank + left
+                else:
+                    if blank % length == length - 1:
+                        raise ValueError(f"move {count} takes the blank off the right of the board")
+                    target = blank + right
+                tiles[blank] = tiles[target]
+                blank = target
+                count += 1
+                if count == checkpoint:
+                    history.extend(directions[recorded:count], get_board)
+                    recorded = count
+                    checkpoint += history.checkpoint_interval
+        finally:
+            history.extend(directions[recorded:count], get_board)
+            tiles[blank] = self.num_of_tiles
+            self.tiles = make_board(tiles)
+            self.track_tiles()
+            self.play_count += count
 
     def get_play_count(self):
         return self.play_count
 
+    def get_rows(self):
+        """
+        This function yields the rows of the board one at a time, so that large boards are never copied whole
+        :return: a generator of lists of integers, one per row
+        """
+        tiles = iter(self.tiles)
+        for _ in range(self.length):
+            yield list(islice(tiles, self.length))
+
     def __str__(self):
+        return "".join("\t".join(map(str, row)) + "\n" for row in self.get_rows())
 
-        tile = 0
-        puzzle_str = ""
-        for i in range(self.length):
-            for j in range(self.length):
-                if j == 0:
-                    puzzle_str = puzzle_str + str(self.tiles[tile])
-                else:
-                    puzzle_str = puzzle_str + "\t" + str(self.tiles[tile])
-                tile += 1
-            puzzle_str = puzzle_str + "\n"
-        return puzzle_str
+    def write_text(self, stream) -> None:
+        """
+        This function writes the board as text, one row per line with the tiles separated by tabs, a row at a time
+        :param stream: the text stream to write to
+        :return: None
+        """
+        for row in self.get_rows():
+            stream.write("\t".join(map(str, row)) + "\n")
+
+    @classmethod
+    def read_text(cls, stream, seed=None):
+        """
+        This function reads a board written by write_text
+        :param stream: the text stream to read from
+        :param seed: the seed of the new model
+        :return: a new Model holding the board
+        """
+        tiles = array('I')
+        for line in stream:
+            tiles.extend(int(tile) for tile in line.split())
+        cls.check_tiles(tiles)
+        return cls(len(tiles), seed, tiles)
+
+    def write_binary(self, stream) -> None:
+        """
+        This function writes the board in binary: a magic number, the number of tiles and the size of a tile as a
+        byte, then the tiles in little endian, a chunk at a time
+        :param stream: the binary stream to write to
+        :return: None
+        """
+        typecode = get_typecode(self.num_of_tiles)
+        itemsize = array(typecode).itemsize
+        stream.write(BINARY_MAGIC + struct.pack("<IB", self.num_of_tiles, itemsize))
+        tiles = iter(self.tiles)
+        for _ in range(0, self.num_of_tiles, BINARY_CHUNK_TILES):
+            chunk = array(typecode, islice(tiles, BINARY_CHUNK_TILES))
+            if sys.byteorder == "big":
+                chunk.byteswap()
+            stream.write(chunk.tobytes())
+
+    @classmethod
+    def read_binary(cls, stream, seed=None):
+        """
+        This function reads a board written by write_binary
+        :param stream: the binary stream to read from
+        :param seed: the seed of the new model
+        :return: a new Model holding the board
+        """
+        header = stream.read(len(BINARY_MAGIC) + 5)
+        if len(header) != len(BINARY_MAGIC) + 5 or header[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            raise ValueError("not a binary board")
+        num_of_tiles, itemsize = struct.unpack("<IB", header[len(BINARY_MAGIC):])
+        typecode = get_typecode(num_of_tiles)
+        if array(typecode).itemsize != itemsize:
+            raise ValueError(f"binary board has {itemsize} byte tiles, expected {array(typecode).itemsize}")
+
+        tiles = array(typecode)
+        while len(tiles) < num_of_tiles:
+            data = stream.read(min(BINARY_CHUNK_TILES, num_of_tiles - len(tiles)) * itemsize)
+            if len(data) == 0 or len(data) % itemsize:
+                raise ValueError("binary board ends early")
+            chunk = array(typecode)
+            chunk.frombytes(data)
+            if sys.byteorder == "big":
+                chunk.byteswap()
+            tiles.extend(chunk)
+        cls.check_tiles(tiles)
+        return cls(num_of_tiles, seed, tiles)
+
+    @staticmethod
+    def check_tiles(tiles) -> None:
+        """
+        This function checks that a loaded board holds every tile once
+        :param tiles: the tiles of the board
+        :return: None
+        """
+        seen = bytearray(len(tiles) + 1)
+        for tile in tiles:
+            if not 1 <= tile <= len(tiles) or seen[tile]:
+                raise ValueError("board must hold every tile from 1 to its size once")
+            seen[tile] = 1
 
     def start_timer(self):
         self.time = datetime.now()
@@ -154,6 +417,8 @@ class Model:
         return (datetime.now() - self.time).total_seconds()
 
 if __name__ == "__main__":
+    from Model.puzzle_validater import is_solvable
+
     model = Model(4)
     puzzle1 = [
         7, 11, 4, 14,
@@ -161,7 +426,7 @@ if __name__ == "__main__":
         8, 13, 6, 3,
         12, 1, 10, 2]
 
-    print(model.is_solvable(puzzle1))
+    print(is_solvable(puzzle1))
 
     puzzle2 = [
         13, 2, 10, 3,
@@ -169,7 +434,7 @@ if __name__ == "__main__":
         5, 16, 9, 6,
         15, 14, 11, 7]
 
-    print(model.is_solvable(puzzle2))
+    print(is_solvable(puzzle2))
 
     puzzle3 = [
         3, 9, 1, 15,
@@ -177,14 +442,14 @@ if __name__ == "__main__":
         13, 16, 10, 12,
         2, 7, 8, 5]
 
-    print(model.is_solvable(puzzle3))
+    print(is_solvable(puzzle3))
 
     puzzle4 = [
         1, 8, 2,
         9, 4, 3,
         7, 6, 5]
 
-    print(model.is_solvable(puzzle4))
+    print(is_solvable(puzzle4))
     ''' print(model)
     move = 0
     while not model.is_done():
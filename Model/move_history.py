@@ -0,0 +1,249 @@
+"""
+move_history.py
+This file contains the MoveHistory class that records the moves of a game in 2 bits each.
+"""
+
+UP = 0
+DOWN = 1
+LEFT = 2
+RIGHT = 3
+MOVES_PER_BYTE = 4
+CHECKPOINT_INTERVAL = 1024  # moves between two board checkpoints, a multiple of MOVES_PER_BYTE
+MAX_HISTORY_MOVES = 1 << 22  # moves kept before the oldest are forgotten, about 1MB of directions
+
+
+def get_direction(offset: int, length: int) -> int:
+    """
+    This function returns the direction the blank moved in from the change of its position
+    :param offset: the new position of the blank minus its old position
+    :param length: the length of a row of the board
+    :return: one of UP, DOWN, LEFT and RIGHT
+    """
+    if offset == -length:
+        return UP
+    if offset == length:
+        return DOWN
+    if offset == -1:
+        return LEFT
+    if offset == 1:
+        return RIGHT
+    raise ValueError(f"the blank cannot move by {offset} on a board of length {length}")
+
+
+def get_offset(direction: int, length: int) -> int:
+    """
+    This function returns the change of the position of the blank when it moves in the given direction
+    :param direction: one of UP, DOWN, LEFT and RIGHT
+    :param length: the length of a row of the board
+    :return: the new position of the blank minus its old position
+    """
+    return (-length, length, -1, 1)[direction]
+
+
+def get_checkpoint_interval(num_of_tiles: int) -> int:
+    """
+    This function returns the checkpoint interval for a board. On large boards a checkpoint is a large copy, so the
+    interval grows with the board to keep the checkpoints about as big as the directions between them.
+    :param num_of_tiles: the number of tiles of the board
+    :return: the number of moves between two checkpoints, a multiple of CHECKPOINT_INTERVAL
+    """
+    return max(1, -(-num_of_tiles // CHECKPOINT_INTERVAL)) * CHECKPOINT_INTERVAL
+
+
+def get_opposite(direction: int) -> int:
+    """
+    This function returns the direction that undoes the given direction
+    :param direction: one of UP, DOWN, LEFT and RIGHT
+    :return: the opposite direction
+    """
+    return direction ^ 1
+
+
+class MoveHistory:
+    """
+    MoveHistory
+    This class records the direction the blank moved in at each move, packed 4 moves to a byte. A cursor marks the
+    current move: undo steps it back and redo forward, and a new move drops the moves that were undone. A copy of the
+    board is kept every CHECKPOINT_INTERVAL moves so that any move can be reached by replaying at most that many
+    moves. Once more than MAX_HISTORY_MOVES are recorded, the oldest interval of moves is forgotten along with its
+    checkpoint, so the memory used stays bounded however long the game lasts.
+    Moves are numbered from the start of the game, forgotten moves included.
+    """
+
+    def __init__(self, board, max_moves=MAX_HISTORY_MOVES, checkpoint_interval=CHECKPOINT_INTERVAL) -> None:
+        """
+        Initializes an empty MoveHistory
+        :param board: a copy of the board before the first move, kept as the first checkpoint
+        :param max_moves: the number of moves kept before the oldest are forgotten
+        :param checkpoint_interval: the number of moves between two checkpoints
+        """
+        if checkpoint_interval % MOVES_PER_BYTE != 0 or checkpoint_interval <= 0:
+            raise ValueError(f"the checkpoint interval must be a positive multiple of {MOVES_PER_BYTE}")
+        self.max_moves = max(max_moves, checkpoint_interval)
+        self.checkpoint_interval = checkpoint_interval
+
+        self.directions = bytearray()
+        self.first = 0  # number of the first move kept
+        self.length = 0  # number of the move after the last recorded one
+        self.cursor = 0  # number of the move after the current one
+        self.checkpoints = [board]  # the board before move first + i * checkpoint_interval
+
+    def get_direction(self, move: int) -> int:
+        """
+        Returns the direction of a recorded move
+        :param move: the number of the move
+        :return: one of UP, DOWN, LEFT and RIGHT
+        """
+        index = move - self.first
+        return (self.directions[index >> 2] >> ((index & 3) << 1)) & 3
+
+    def push(self, direction: int, get_board) -> None:
+        """
+        Records a new move after the current one, dropping the moves that were undone
+        :param direction: the direction the blank moved in
+        :param get_board: a function returning a copy of the board after the move, called when a checkpoint is due
+        :return: None
+        """
+        if self.cursor < self.length:
+            self.truncate()
+
+        index = self.cursor - self.first
+        shift = (index & 3) << 1
+        if shift == 0:
+            self.directions.append(direction)
+        else:
+            self.directions[-1] |= direction << shift
+        self.cursor = self.length = self.cursor + 1
+
+        if (index + 1) % self.checkpoint_interval == 0:
+            self.checkpoints.append(get_board())
+            if self.cursor - self.first > self.max_moves:
+                self.forget()
+
+    def get_moves_to_checkpoint(self) -> int:
+        """
+        Returns the number of moves that can be recorded after the current one before the next checkpoint is due
+        :return: the number of moves, at least 1
+        """
+        return self.checkpoint_interval - (self.cursor - self.first) % self.checkpoint_interval
+
+    def extend(self, directions, get_board) -> None:
+        """
+        Records several new moves after the current one at once, dropping the moves that were undone. It is the same
+        as pushing them one at a time, but whole bytes of directions are packed at once.
+        :param directions: a sequence of the directions the blank moved in, no more than get_moves_to_checkpoint
+        :param get_board: a function returning a copy of the board after the moves, called when a checkpoint is due
+        :return: None
+        """
+        if len(directions) > self.get_moves_to_checkpoint():
+            raise ValueError("the moves run past the next checkpoint")
+        if not directions:
+            return
+        if self.cursor < self.length:
+            self.truncate()
+
+        # the moves that share the last byte are added one at a time, the rest four to a byte
+        index = self.cursor - self.first
+        head = -index & 3
+        for direction in directions[:head]:
+            self.directions[-1] |= direction << ((index & 3) << 1)
+            index += 1
+        rest = directions[head:]
+        full = len(rest) & ~3
+        self.directions += bytes(first | second << 2 | third << 4 | fourth << 6 for first, second, third, fourth
+                                 in zip(rest[0:full:4], rest[1:full:4], rest[2:full:4], rest[3:full:4]))
+        if full < len(rest):
+            self.directions.append(sum(direction << (slot << 1) for slot, direction in enumerate(rest[full:])))
+        self.cursor = self.length = self.cursor + len(directions)
+
+        if (self.cursor - self.first) % self.checkpoint_interval == 0:
+            self.checkpoints.append(get_board())
+            if self.cursor - self.first > self.max_moves:
+                self.forget()
+
+    def truncate(self) -> None:
+        """
+        Drops the moves after the current one along with their checkpoints
+        :return: None
+        """
+        index = self.cursor - self.first
+        del self.directions[(index + 3) >> 2:]
+        if index & 3:
+            # clear the bits of the dropped moves that share the last byte
+            self.directions[-1] &= (1 << ((index & 3) << 1)) - 1
+        del self.checkpoints[index // self.checkpoint_interval + 1:]
+        self.length = self.cursor
+
+    def forget(self) -> None:
+        """
+        Forgets the oldest interval of moves and its checkpoint
+        :return: None
+        """
+        del self.directions[:self.checkpoint_interval // MOVES_PER_BYTE]
+        del self.checkpoints[0]
+        self.first += self.checkpoint_interval
+
+    def can_undo(self) -> bool:
+        """
+        Returns whether there is a move to undo
+        :return: True if there is a move to undo. False otherwise
+        """
+        return self.cursor > self.first
+
+    def can_redo(self) -> bool:
+        """
+        Returns whether there is an undone move to redo
+        :return: True if there is a move to redo. False otherwise
+        """
+        return self.cursor < self.length
+
+    def undo(self):
+        """
+        Steps back over the current move
+        :return: the direction of the move, or None if there is nothing to undo
+        """
+        if not self.can_undo():
+            return None
+        self.cursor -= 1
+        return self.get_direction(self.cursor)
+
+    def redo(self):
+        """
+        Steps forward over the next undone move
+        :return: the direction of the move, or None if there is nothing to redo
+        """
+        if not self.can_redo():
+            return None
+        self.cursor += 1
+        return self.get_direction(self.cursor - 1)
+
+    def seek(self, move: int):
+        """
+        Moves the cursor to the given move, from the closest checkpoint before it
+        :param move: the number of moves to be at, between the first kept move and the last recorded one
+        :return: a tuple of the checkpoint board to start from and the directions to replay from it
+        """
+        if not self.first <= move <= self.length:
+            raise ValueError(f"move {move} is not in the history, which holds moves {self.first} to {self.length}")
+        checkpoint = (move - self.first) // self.checkpoint_interval
+        start = self.first + checkpoint * self.checkpoint_interval
+        self.cursor = move
+        return self.checkpoints[checkpoint], [self.get_direction(number) for number in range(start, move)]
+
+    def get_directions(self) -> list[int]:
+        """
+        Returns the directions of every kept move up to the current one
+        :return: a list of directions
+        """
+        return [self.get_direction(move) for move in range(self.first, self.cursor)]
+
+    def __len__(self) -> int:
+        return self.cursor
+
+
+if __name__ == '__main__':
+    history = MoveHistory("start", checkpoint_interval=4, max_moves=8)
+    for number, step in enumerate([RIGHT, DOWN, LEFT, UP, RIGHT, RIGHT, DOWN, DOWN, LEFT, UP]):
+        history.push(step, lambda: f"after {number + 1}")
+    print(history.first, history.length, history.checkpoints, history.get_directions())
+    print(history.undo(), history.undo(), history.redo(), history.seek(9))
@@ -0,0 +1,321 @@
+"""
+pattern_database.py
+This file contains the disjoint additive pattern database heuristic for the 16 tile puzzles and the offline builder of
+its binary table file.
+"""
+
+import mmap
+import os
+from array import array
+from math import perm
+from time import perf_counter
+from Model.ranking import rank, unrank
+
+DATABASE_PATH = "./Model/fifteen.pdb"  # binary file holding the tables for the 4x4 board
+MAGIC = b"PDB2"  # PDB1 files indexed each table by the packed positions of its tiles and are no longer read
+UNREACHED = 0xFF
+
+# tiles are grouped into disjoint patterns whose costs can be added together: a 6-6-3 split of the 4x4 board into
+# the top-left block, the right hand block and the bottom row
+DEFAULT_PARTITION = ((1, 2, 3, 5, 6, 9), (4, 7, 8, 10, 11, 12), (13, 14, 15))
+
+
+def get_table_size(pattern_size: int, num_of_tiles: int) -> int:
+    """
+    Returns the number of entries of a pattern table, one per placement of the pattern tiles on distinct positions
+    :param pattern_size: the number of tiles of the pattern
+    :param num_of_tiles: the number of tiles of the board
+    :return: num_of_tiles! / (num_of_tiles - pattern_size)!
+    """
+    return perm(num_of_tiles, pattern_size)
+
+
+def get_seen_typecode(num_of_tiles: int) -> str:
+    """
+    Returns the smallest array typecode with a bit for every position of the board
+    :param num_of_tiles: the number of tiles of the board
+    :return: the array typecode
+    """
+    for typecode in ('H', 'I', 'Q'):
+        if num_of_tiles <= 8 * array(typecode).itemsize:
+            return typecode
+    raise ValueError(f"pattern databases are limited to boards of {8 * array('Q').itemsize} tiles")
+
+
+def get_neighbours(length: int) -> list[tuple]:
+    """
+    Returns the adjacent positions of every position on a length by length board
+    :param length: the number of tiles in a row of the board
+    :return: a list where the entry at each position is a tuple of its adjacent positions
+    """
+    neighbours = []
+    for pos in range(length * length):
+        row, col = divmod(pos, length)
+        neighbours.append(tuple(row * length + c for c in (col - 1, col + 1) if 0 <= c < length) +
+                          tuple(r * length + col for r in (row - 1, row + 1) if 0 <= r < length))
+    return neighbours
+
+
+def build_pattern_table(pattern: tuple, length: int) -> bytearray:
+    """
+    This function computes the table of one pattern with a breadth-first search backwards from the solved board.
+    The entry of a placement of the pattern tiles is the least number of pattern tile moves needed to bring them
+    home; moves of the other tiles are free, which is what makes the tables of disjoint patterns additive.
+    Each placement is indexed by the rank of the positions of the pattern tiles, so the table has no unused entries.
+    :param pattern: the tiles of the pattern
+    :param length: the number of tiles in a row of the board
+    :return: the table of the pattern
+    """
+    num_of_tiles = length * length
+    size = get_table_size(len(pattern), num_of_tiles)
+    neighbours = get_neighbours(length)
+
+    table = bytearray([UNREACHED]) * size
+    # bit mask of the blank positions already expanded for each placement
+    typecode = get_seen_typecode(num_of_tiles)
+    seen = array(typecode, bytes(array(typecode).itemsize * size))
+
+    # the cells the blank can reach for free and the pattern moves on the border of that region only depend on
+    # which cells are occupied and where the blank is, so they are computed once
+    regions = {}
+
+    def get_region(occupied: int, blank: int) -> tuple:
+        key = (occupied, blank)
+        if key not in regions:
+            region = 1 << blank
+            cells = [blank]
+            moves = []
+            for cell in cells:
+                for pos in neighbours[cell]:
+                    if occupied >> pos & 1:
+                        moves.append((cell, pos))
+                    elif not region >> pos & 1:
+                        region |= 1 << pos
+                        cells.append(pos)
+            regions[key] = (region, moves)
+        return regions[key]
+
+    frontier = [(rank([tile - 1 for tile in pattern], num_of_tiles), num_of_tiles - 1)]
+    depth = 0
+    while frontier:
+        next_frontier = []
+        for index, blank in frontier:
+            if seen[index] >> blank & 1:
+                continue
+            positions = unrank(index, len(pattern), num_of_tiles)
+            occupied = 0
+            for pos in positions:
+                occupied |= 1 << pos
+            region, moves = get_region(occupied, blank)
+            seen[index] |= region
+            if table[index] == UNREACHED:
+                table[index] = depth
+
+            for cell, pos in moves:
+                # the pattern tile at pos slides into the free cell and leaves the blank behind
+                slot = positions.index(pos)
+                positions[slot] = cell
+                new_index = rank(positions, num_of_tiles)
+                positions[slot] = pos
+                if not seen[new_index] >> pos & 1:
+                    next_frontier.append((new_index, pos))
+        frontier = next_frontier
+        depth += 1
+    return table
+
+
+def build_database(path=DATABASE_PATH, partition=DEFAULT_PARTITION, length=4) -> None:
+    """
+    This function builds the tables of every pattern in the partition and writes them to a binary file. The file
+    is a small header describing the partition followed by the raw tables, one byte per placement of the tiles of
+    each pattern.
+    :param path: the path of the binary file
+    :param partition: the disjoint patterns, every tile except the blank must be in exactly one
+    :param length: the number of tiles in a row of the board
+    :return: None
+    """
+    tiles = sorted(tile for pattern in partition for tile in pattern)
+    if tiles != list(range(1, length * length)):
+        raise ValueError("the partition must contain every tile except the blank exactly once")
+
+    header = bytearray(MAGIC)
+    header += bytes([length, len(partition)])
+    for pattern in partition:
+        header += bytes([len(pattern), *pattern])
+
+    with open(path, mode="wb") as database_file:
+        database_file.write(header)
+        for pattern in partition:
+            start = perf_counter()
+            database_file.write(build_pattern_table(pattern, length))
+            print(f"pattern {pattern} built in {perf_counter() - start:.1f}s")
+
+
+class PatternDatabase:
+    """
+    PatternDatabase
+    This class holds the tables of the disjoint additive pattern database heuristic. The tables are memory-mapped
+    from the binary file so lookups are single byte reads, and every process using the same file shares one copy of
+    them. It is only read after loading, so one instance can serve any number of searches at once; each search takes
+    its own PatternHeuristic from get_heuristic.
+    """
+
+    def __init__(self, path=DATABASE_PATH) -> None:
+        """
+        Initializes the tables by memory-mapping the given database file
+        :param path: the path of the binary file made by build_database
+        """
+        with open(path, mode="rb") as database_file:
+            self.table = mmap.mmap(database_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.table[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a pattern database of this version")
+        self.length = self.table[len(MAGIC)]
+        self.num_of_tiles = self.length * self.length
+
+        # slots[tile] holds the pattern number of the tile and its place among the tiles of the pattern
+        self.slots = [None] * (self.num_of_tiles + 1)
+        self.patterns = []
+        self.offsets = []
+        offset = len(MAGIC) + 2
+        for pattern_number in range(self.table[len(MAGIC) + 1]):
+            size = self.table[offset]
+            pattern = tuple(self.table[offset + 1:offset + 1 + size])
+            for slot, tile in enumerate(pattern):
+                self.slots[tile] = (pattern_number, slot)
+            self.patterns.append(pattern)
+            offset += 1 + size
+        for pattern in self.patterns:
+            self.offsets.append(offset)
+            offset += get_table_size(len(pattern), self.num_of_tiles)
+
+        if offset != len(self.table):
+            raise ValueError(f"{path} is truncated")
+
+        # the digit of a slot in the rank of a pattern is the position of its tile less the number of positions
+        # before it taken by the tiles of earlier slots. weights[tile] is what the rank gains when the digit of the
+        # tile grows by one, and passing[tile][other] what it gains when the tile moves forward past the other tile:
+        # the digit of the tile shrinks if the other comes first in the pattern, else the digit of the other grows
+        self.weights = [0] * (self.num_of_tiles + 1)
+        self.passing = [[0] * (self.num_of_tiles + 1) for _ in range(self.num_of_tiles + 1)]
+        for pattern in self.patterns:
+            for slot, tile in enumerate(pattern):
+                self.weights[tile] = perm(self.num_of_tiles - slot - 1, len(pattern) - slot - 1)
+            for slot, tile in enumerate(pattern):
+                for other_slot, other in enumerate(pattern):
+                    if other_slot < slot:
+                        self.passing[tile][other] = -self.weights[tile]
+                    elif other_slot > slot:
+                        self.passing[tile][other] = self.weights[other]
+
+        self.pattern_numbers = [slot[0] if slot is not None else None for slot in self.slots]
+        # what the rank gains when the tile moves forward by a row, before the tiles it passes are accounted for
+        self.column_weights = [weight * self.length for weight in self.weights]
+
+    def get_heuristic(self):
+        """
+        Returns a new heuristic reading these tables, to be used by one search at a time
+        :return: the PatternHeuristic instance
+        """
+        return PatternHeuristic(self)
+
+
+class PatternHeuristic:
+    """
+    PatternHeuristic
+    This class is the pattern database heuristic of one search. It keeps the table index of each pattern for the
+    current board so that a tile move is a small update instead of ranking the positions of the pattern again. The
+    tables are shared with its PatternDatabase.
+    """
+
+    def __init__(self, database: PatternDatabase) -> None:
+        """
+        Initializes the heuristic over the tables of the given database
+        :param database: the PatternDatabase to read
+        """
+        self.table = database.table
+        self.num_of_tiles = database.num_of_tiles
+        self.length = database.length
+        self.slots = database.slots
+        self.offsets = database.offsets
+        self.patterns = database.patterns
+        self.pattern_numbers = database.pattern_numbers
+        self.weights = database.weights
+        self.column_weights = database.column_weights
+        self.passing = database.passing
+
+        # the index of each pattern is its offset in the file plus the rank of the positions of its tiles
+        self.indexes = list(self.offsets)
+        self.estimate = 0
+
+    def reset(self, tiles: list[int]) -> int:
+        """
+        Evaluates the whole board and stores the index of each pattern used by move
+        :param tiles: the board
+        :return: the estimated number of moves left
+        """
+        if len(tiles) != self.num_of_tiles:
+            raise ValueError(f"the pattern database is for boards of {self.num_of_tiles} tiles")
+        positions = [[0] * len(pattern) for pattern in self.patterns]
+        for pos, tile in enumerate(tiles):
+            if tile != self.num_of_tiles:
+                pattern_number, slot = self.slots[tile]
+                positions[pattern_number][slot] = pos
+        self.indexes = [offset + rank(pattern_positions, self.num_of_tiles)
+                        for offset, pattern_positions in zip(self.offsets, positions)]
+        self.estimate = sum(self.table[index] for index in self.indexes)
+        return self.estimate
+
+    def move(self, tiles: list[int], tile: int, src: int, dst: int) -> int:
+        """
+        Updates the estimate after a tile has been moved from src to dst. Only the pattern of the moved tile changes,
+        and of its rank only the digits of the moved tile and of the pattern tiles it passes: none on a move along a
+        row, the ones of the row in between on a move along a column.
+        :param tiles: the board after the move
+        :param tile: the tile that was moved
+        :param src: the position the tile left
+        :param dst: the position the tile moved to
+        :return: the estimated number of moves left
+        """
+        pattern_number = self.pattern_numbers[tile]
+        indexes = self.indexes
+        index = indexes[pattern_number]
+        step = dst - src
+        if step == 1:
+            new_index = index + self.weights[tile]
+        elif step == -1:
+            new_index = index - self.weights[tile]
+        else:
+            passing = self.passing[tile]
+            change = self.column_weights[tile]
+            first = (src if step > 0 else dst) + 1
+            for other in tiles[first:first + self.length - 1]:
+                change += passing[other]
+            new_index = index + change if step > 0 else index - change
+        indexes[pattern_number] = new_index
+        table = self.table
+        self.estimate += table[new_index] - table[index]
+        return self.estimate
+
+
+def load_pattern_database(num_of_tiles: int, path=DATABASE_PATH):
+    """
+    Returns the pattern database heuristic if a database file for the board size has been built
+    :param num_of_tiles: the number of tiles of the board
+    :param path: the path of the binary file
+    :return: the PatternDatabase instance or None if there is no usable database
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        database = PatternDatabase(path)
+    except ValueError:
+        # a file of an older version or a truncated one is not used, it has to be built again
+        return None
+    if database.num_of_tiles != num_of_tiles:
+        return None
+    return database
+
+
+if __name__ == '__main__':
+    build_database()
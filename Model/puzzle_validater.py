@@ -1,26 +1,62 @@
-from math import sqrt
+from math import isqrt
 
 
 def get_inv_count(arr):
-    inv_count = 0
+    # count pairs(arr[i], arr[j]) such that i < j and arr[i] > arr[j] while
+    # ignoring the blank. A Fenwick tree over the tile values holds how many
+    # of the tiles seen so far are smaller than the current one, which makes
+    # the count O(n log n) instead of comparing every pair
     number_tiles = len(arr)
-    for i in range(number_tiles - 1):
-        for j in range(i + 1, number_tiles):
-            # count pairs(arr[i], arr[j]) such that
-            # i < j and arr[i] > arr[j]
-            if arr[i] != number_tiles and arr[j] != number_tiles and arr[i] > arr[j]:
-                inv_count += 1
+    tree = [0] * (number_tiles + 1)
+    inv_count = 0
+    seen = 0
+    for value in arr:
+        if value == number_tiles:
+            continue
+
+        smaller = 0
+        i = value
+        while i > 0:
+            smaller += tree[i]
+            i -= i & -i
+        inv_count += seen - smaller
+        seen += 1
+
+        i = value
+        while i <= number_tiles:
+            tree[i] += 1
+            i += i & -i
 
     return inv_count
 
 
+def get_inv_parity(arr):
+    # the parity of the inversion count while ignoring the blank. The tiles
+    # without the blank are a permutation, and the parity of a permutation is
+    # its length minus its number of cycles, so it takes one O(n) pass over
+    # the cycles instead of counting the inversions
+    number_tiles = len(arr)
+    permutation = [value - 1 for value in arr if value != number_tiles]
+    seen = bytearray(len(permutation))
+    cycles = 0
+    for start in range(len(permutation)):
+        if seen[start]:
+            continue
+        cycles += 1
+        i = start
+        while not seen[i]:
+            seen[i] = 1
+            i = permutation[i]
+    return (len(permutation) - cycles) & 1
+
+
 # This function returns true if given
 # instance of N*N - 1 puzzle is solvable
 def is_solvable(puzzle):
-    length = int(sqrt(len(puzzle)))
+    length = isqrt(len(puzzle))
 
-    # Count inversions in given puzzle
-    inv_count = get_inv_count(puzzle)
+    # only the parity of the inversion count matters
+    inv_count = get_inv_parity(puzzle)
 
     # If grid is odd, return true if inversion
     # count is even.
@@ -35,6 +71,52 @@ def is_solvable(puzzle):
             return inv_count % 2 != 0
 
 
+# This function returns a boolean vector telling which rows of a 2-D
+# NumPy array of N*N - 1 puzzles are solvable
+def are_solvable(boards):
+    # numpy is only needed to check boards in batches, so it is imported here
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("numpy is required to check boards in batches") from None
+
+    boards = np.asarray(boards)
+    count, number_tiles = boards.shape
+    length = isqrt(number_tiles)
+    rows = np.arange(count)
+
+    # only the parity of the inversion count matters, so the Fenwick tree of
+    # every board holds its prefix counts modulo 2
+    tree = np.zeros((count, number_tiles + 1), dtype=np.uint8)
+    parity = np.zeros(count, dtype=np.uint8)
+    seen = np.zeros(count, dtype=np.uint8)
+    for column in range(number_tiles):
+        values = boards[:, column].astype(np.int64)
+        active = values != number_tiles
+
+        smaller = np.zeros(count, dtype=np.uint8)
+        i = np.where(active, values, 0)
+        while i.any():
+            smaller ^= tree[rows, i]
+            i -= i & -i
+        parity ^= (seen ^ smaller) & active
+        seen ^= active
+
+        i = np.where(active, values, number_tiles + 1)
+        while (i <= number_tiles).any():
+            inside = i <= number_tiles
+            tree[rows[inside], i[inside]] ^= 1
+            i += i & -i
+
+    # If grid is odd, the inversion count must be even. If grid is even, the
+    # parity of the inversion count must differ from the parity of the row of
+    # the blank counted from the bottom
+    if length & 1:
+        return parity == 0
+    pos = length - np.argmax(boards == number_tiles, axis=1) // length
+    return (parity ^ (pos & 1)) == 1
+
+
 if __name__ == '__main__':
 
     puzzle1 = [
@@ -0,0 +1,39 @@
+"""
+ranking.py
+This file contains the permutation ranking that numbers the arrangements of distinct values densely. It indexes the
+boards of the distance database and the tile placements of the pattern database.
+"""
+
+
+def rank(items, size: int) -> int:
+    """
+    This function numbers the arrangements of k distinct values taken from range(size) densely, from 0 up to
+    size! / (size - k)! - 1, in lexicographic order. Ranking the first tiles of a whole board indexes the board, and
+    ranking the positions of a few tiles indexes a partial pattern.
+    :param items: the distinct values, each in range(size)
+    :param size: the number of values to choose from
+    :return: the rank of the arrangement
+    """
+    index = 0
+    used = 0
+    for slot, item in enumerate(items):
+        # the place of the item among the values not used yet
+        index = index * (size - slot) + item - (used & ((1 << item) - 1)).bit_count()
+        used |= 1 << item
+    return index
+
+
+def unrank(index: int, count: int, size: int) -> list[int]:
+    """
+    This function is the inverse of rank
+    :param index: the rank of the arrangement
+    :param count: the number of values in the arrangement
+    :param size: the number of values to choose from
+    :return: the list of values
+    """
+    digits = []
+    for slot in reversed(range(count)):
+        index, digit = divmod(index, size - slot)
+        digits.append(digit)
+    available = list(range(size))
+    return [available.pop(digit) for digit in reversed(digits)]
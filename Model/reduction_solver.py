@@ -0,0 +1,407 @@
+"""
+reduction_solver.py
+This file contains the ReductionSolver class that quickly finds a good but not optimal solution for boards of any size.
+"""
+
+from array import array
+from collections import deque
+from math import isqrt
+from time import perf_counter
+from Model.board_state import get_typecode
+from Model.puzzle_validater import is_solvable
+
+CLOCK_CHECK_MOVES = 4096  # moves made between two checks of the time limit
+LAST_SQUARE_MOVES = 12  # turns of the blank around the last 2x2 square after which every tile is back in place
+BFS_MARGINS = (1, 3)  # margins around the blank and its target tried before searching the whole free area
+
+
+class ReductionSolver:
+    """
+    ReductionSolver
+    This class solves a board of any size by reducing it: the top row of the unsolved area is put in place and locked,
+    then its left column, until only a 2x2 square is left, which is turned until it is solved. Each tile is walked
+    to its place one cell at a time by bringing the blank in front of it; the last two tiles of a row or column are
+    first set up next to their places and then turned in together. The solution is not optimal, but it is found in
+    time linear in its length and with memory linear in the board.
+    The moves are produced by a generator as they are found, so they can be played or checked before the solution is
+    complete. Like the Solver, each move is the tile to click.
+    """
+
+    def __init__(self, puzzle, time_limit=None, memory_limit=None) -> None:
+        """
+        Initializes the ReductionSolver with a board
+        :param puzzle: a Model or a list of integers representing the board, numbered 1 to n with n as the blank
+        :param time_limit: the number of seconds the moves may take to produce in total. No limit if None
+        :param memory_limit: the number of bytes the solver may use. No limit if None
+        """
+        tiles = puzzle.get_puzzle() if hasattr(puzzle, "get_puzzle") else list(puzzle)
+        num_of_tiles = len(tiles)
+        side = isqrt(num_of_tiles)
+        if num_of_tiles == 0 or side * side != num_of_tiles:
+            raise ValueError("size of board must be a perfect squared value")
+        if sorted(tiles) != list(range(1, num_of_tiles + 1)):
+            raise ValueError("board must hold every tile from 1 to its size once")
+        if not is_solvable(tiles):
+            raise ValueError("board is not solvable")
+
+        typecode = get_typecode(num_of_tiles)
+        # the board, the positions and the locked cells, plus at most the whole free area for one search
+        needed = num_of_tiles * (2 * array(typecode).itemsize + 1) + num_of_tiles * 8
+        if memory_limit is not None and needed > memory_limit:
+            raise MemoryError(f"solving {num_of_tiles} tiles needs about {needed} bytes, over the limit of "
+                              f"{memory_limit}")
+
+        self.side = side
+        self.num_of_tiles = num_of_tiles
+        self.tiles = array(typecode, tiles)
+        self.positions = array(typecode, [0]) * (num_of_tiles + 1)
+        for pos, tile in enumerate(self.tiles):
+            self.positions[tile] = pos
+        self.locked = bytearray(num_of_tiles)
+
+        self.time_limit = time_limit
+        self.deadline = None
+        self.moves_made = 0
+        self.elapsed = 0.0
+        self.is_finished = False
+
+    def moves(self):
+        """
+        This generator yields the tiles to click, one move at a time, until the board is solved
+        :return: a generator of tile numbers
+        """
+        start = perf_counter()
+        self.deadline = None if self.time_limit is None else start + self.time_limit
+        try:
+            for corner in range(self.side - 2):
+                yield from self.solve_row(corner)
+                yield from self.solve_column(corner)
+            if self.side >= 2:
+                yield from self.solve_last_square()
+            self.is_finished = True
+        finally:
+            self.elapsed = perf_counter() - start
+
+    def solve(self) -> list[int]:
+        """
+        Returns the whole solution at once
+        :return: the list of tiles to click
+        """
+        return list(self.moves())
+
+    def get_solution_length(self) -> int:
+        """
+        Returns the number of moves produced so far, which is the length of the solution once it is finished
+        :return: the number of moves
+        """
+        return self.moves_made
+
+    def get_goal(self, row: int, col: int) -> int:
+        """
+        Returns the tile that belongs at a cell
+        :param row: the row of the cell
+        :param col: the column of the cell
+        :return: the tile number
+        """
+        return row * self.side + col + 1
+
+    def solve_row(self, row: int):
+        """
+        This generator puts the top row of the unsolved area in place, the row starting at the given row and column
+        :param row: the row, which is also the first column of the unsolved area
+        :return: a generator of tile numbers
+        """
+        side = self.side
+        for col in range(row, side - 2):
+            cell = row * side + col
+            yield from self.place(self.get_goal(row, col), cell)
+            self.locked[cell] = 1
+        yield from self.place_pair(row * side + side - 2, row * side + side - 1, side)
+
+    def solve_column(self, col: int):
+        """
+        This generator puts the left column of the unsolved area in place, below its already solved top row
+        :param col: the column, which is also the row of the solved top row
+        :return: a generator of tile numbers
+        """
+        side = self.side
+        for row in range(col + 1, side - 2):
+            cell = row * side + col
+            yield from self.place(self.get_goal(row, col), cell)
+            self.locked[cell] = 1
+        yield from self.place_pair((side - 2) * side + col, (side - 1) * side + col, 1)
+
+    def place_pair(self, first: int, second: int, inward: int):
+        """
+        This generator puts the last two tiles of a row or column in place. Walking them in one at a time can trap
+        the blank in the corner, so the second tile is only put on the place of the first, the first tile and the
+        blank are brought into the 3x3 window at the end of the row or column, and the shortest way to finish the
+        pair inside the window is searched for.
+        :param first: the place of the first tile
+        :param second: the place of the second tile, after the first along the row or column
+        :param inward: the step from the place of the first tile into the unsolved area
+        :return: a generator of tile numbers
+        """
+        first_tile = first + 1
+        second_tile = second + 1
+        if self.positions[first_tile] != first or self.positions[second_tile] != second:
+            along = second - first
+            window = [first + depth * inward + shift * along for depth in range(3) for shift in (-1, 0, 1)]
+            yield from self.place(second_tile, first)
+            self.locked[first] = 1
+            if self.positions[first_tile] not in window:
+                yield from self.place(first_tile, first + 2 * inward)
+            self.locked[first] = 0
+
+            blank = self.positions[self.num_of_tiles]
+            if blank not in window:
+                for tile in (first_tile, second_tile):
+                    self.locked[self.positions[tile]] = 1
+                path = self.search_path(blank, set(window), -1, (0, self.side - 1, 0, self.side - 1))
+                for tile in (first_tile, second_tile):
+                    self.locked[self.positions[tile]] = 0
+                if path is None:
+                    raise RuntimeError(f"the blank cannot reach the tiles {first_tile} and {second_tile}")
+                for step in path:
+                    yield self.step(step)
+
+            for step in self.search_pair(window, first_tile, second_tile):
+                yield self.step(step)
+        self.locked[first] = 1
+        self.locked[second] = 1
+
+    def search_pair(self, window: list[int], first_tile: int, second_tile: int) -> list[int]:
+        """
+        Finds the shortest way to put two tiles in place while the blank stays inside a window with both of them
+        :param window: the cells of the window
+        :param first_tile: the first tile, which belongs at its number minus one like every tile
+        :param second_tile: the second tile
+        :return: the list of cells to move the blank through
+        """
+        side = self.side
+        free = {cell for cell in window if not self.locked[cell]}
+        neighbours = {cell: [other for other in (cell - side, cell + side, cell - 1, cell + 1) if other in free
+                             and (other // side == cell // side or other % side == cell % side)]
+                      for cell in free}
+        goal = (first_tile - 1, second_tile - 1)
+        start = (self.positions[first_tile], self.positions[second_tile], self.positions[self.num_of_tiles])
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            first, second, blank = state
+            if (first, second) == goal:
+                path = []
+                while came_from[state] is not None:
+                    path.append(state[2])
+                    state = came_from[state]
+                path.reverse()
+                return path
+            for cell in neighbours[blank]:
+                moved = (blank if cell == first else first, blank if cell == second else second, cell)
+                if moved not in came_from:
+                    came_from[moved] = state
+                    queue.append(moved)
+        raise RuntimeError(f"the tiles {first_tile} and {second_tile} cannot be put in place")
+
+    def solve_last_square(self):
+        """
+        This generator turns the blank around the last 2x2 square until it is solved
+        :return: a generator of tile numbers
+        """
+        side = self.side
+        top_left = (side - 2) * side + side - 2
+        cycle = [top_left, top_left + 1, top_left + 1 + side, top_left + side]
+        yield from self.move_blank(top_left + 1 + side)
+        turn = cycle.index(self.positions[self.num_of_tiles])
+        for _ in range(LAST_SQUARE_MOVES):
+            if all(self.tiles[cell] == cell + 1 for cell in cycle):
+                return
+            turn = (turn + 1) % 4
+            yield self.step(cycle[turn])
+        if not all(self.tiles[cell] == cell + 1 for cell in cycle):
+            raise RuntimeError("the last square could not be solved")
+
+    def place(self, tile: int, target: int):
+        """
+        This generator walks a tile to the target cell, one cell at a time, without moving any locked tile
+        :param tile: the tile
+        :param target: the cell
+        :return: a generator of tile numbers
+        """
+        side = self.side
+        target_row, target_col = divmod(target, side)
+        while self.positions[tile] != target:
+            pos = self.positions[tile]
+            row, col = divmod(pos, side)
+            # the next cell is one step closer, vertically first
+            candidates = []
+            if row != target_row:
+                candidates.append(pos + (side if target_row > row else -side))
+            if col != target_col:
+                candidates.append(pos + (1 if target_col > col else -1))
+
+            for cell in candidates:
+                if self.locked[cell]:
+                    continue
+                path = self.find_path(self.positions[self.num_of_tiles], cell, pos)
+                if path is not None:
+                    break
+            else:
+                raise RuntimeError(f"tile {tile} cannot be moved towards cell {target}")
+            for step in path:
+                yield self.step(step)
+            yield self.step(pos)
+
+    def move_blank(self, target: int):
+        """
+        This generator walks the blank to the target cell without moving any locked tile
+        :param target: the cell
+        :return: a generator of tile numbers
+        """
+        path = self.find_path(self.positions[self.num_of_tiles], target, -1)
+        if path is None:
+            raise RuntimeError(f"the blank cannot reach cell {target}")
+        for step in path:
+            yield self.step(step)
+
+    def find_path(self, start: int, target: int, avoid: int):
+        """
+        Finds a path for the blank that stays off the locked cells and the given cell. Since the free area is nearly
+        always a rectangle, the two L shaped paths are tried first, then the paths that go around the given cell
+        through one of its diagonal neighbours; otherwise a breadth first search is run in a box around both cells,
+        widened up to the whole board.
+        :param start: the cell of the blank
+        :param target: the cell to reach
+        :param avoid: a cell to stay off, -1 for none
+        :return: the list of cells to move the blank through, ending with the target, or None if there is none
+        """
+        if start == target:
+            return []
+        for columns_first in (True, False):
+            path = self.get_straight_path(start, target, avoid, columns_first)
+            if path is not None:
+                return path
+
+        side = self.side
+        if avoid >= 0:
+            row, col = divmod(avoid, side)
+            corners = [(row + rows) * side + col + cols for rows in (-1, 1) for cols in (-1, 1)
+                       if 0 <= row + rows < side and 0 <= col + cols < side]
+            corners.sort(key=lambda corner: self.get_distance(start, corner) + self.get_distance(corner, target))
+            for corner in corners:
+                for columns_first in (True, False):
+                    path = self.get_straight_path(start, corner, avoid, columns_first)
+                    if path is None:
+                        continue
+                    rest = self.get_straight_path(corner, target, avoid, not columns_first)
+                    if rest is None:
+                        rest = self.get_straight_path(corner, target, avoid, columns_first)
+                    if rest is not None:
+                        return path + rest
+
+        start_row, start_col = divmod(start, side)
+        target_row, target_col = divmod(target, side)
+        for margin in (*BFS_MARGINS, side):
+            path = self.search_path(start, {target}, avoid, (max(0, min(start_row, target_row) - margin),
+                                                           min(side - 1, max(start_row, target_row) + margin),
+                                                           max(0, min(start_col, target_col) - margin),
+                                                           min(side - 1, max(start_col, target_col) + margin)))
+            if path is not None:
+                return path
+        return None
+
+    def get_distance(self, start: int, target: int) -> int:
+        """
+        Returns the number of moves between two cells on an empty board
+        :param start: the first cell
+        :param target: the second cell
+        :return: the Manhattan distance
+        """
+        start_row, start_col = divmod(start, self.side)
+        target_row, target_col = divmod(target, self.side)
+        return abs(start_row - target_row) + abs(start_col - target_col)
+
+    def get_straight_path(self, start: int, target: int, avoid: int, columns_first: bool):
+        """
+        Returns the L shaped path for the blank that goes along the row then the column, or the other way around
+        :param start: the cell of the blank
+        :param target: the cell to reach
+        :param avoid: a cell to stay off, -1 for none
+        :param columns_first: whether to move along the row first
+        :return: the list of cells to move the blank through, or None if the path crosses a locked or given cell
+        """
+        side = self.side
+        start_row, start_col = divmod(start, side)
+        target_row, target_col = divmod(target, side)
+        across = (1 if target_col > start_col else -1, abs(target_col - start_col))
+        down = (side if target_row > start_row else -side, abs(target_row - start_row))
+        path = []
+        cell = start
+        for step, count in (across, down) if columns_first else (down, across):
+            for _ in range(count):
+                cell += step
+                if self.locked[cell] or cell == avoid:
+                    return None
+                path.append(cell)
+        return path
+
+    def search_path(self, start: int, targets: set, avoid: int, box: tuple):
+        """
+        Finds the shortest path for the blank inside a box to the closest of the given cells with a breadth first
+        search
+        :param start: the cell of the blank
+        :param targets: the cells to reach
+        :param avoid: a cell to stay off, -1 for none
+        :param box: the (first row, last row, first column, last column) of the box
+        :return: the list of cells to move the blank through, or None if no target can be reached in the box
+        """
+        side = self.side
+        first_row, last_row, first_col, last_col = box
+        came_from = {start: -1}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            if cell in targets:
+                path = []
+                while cell != start:
+                    path.append(cell)
+                    cell = came_from[cell]
+                path.reverse()
+                return path
+            row, col = divmod(cell, side)
+            for neighbour, inside in ((cell - side, row > first_row), (cell + side, row < last_row),
+                                      (cell - 1, col > first_col), (cell + 1, col < last_col)):
+                if inside and neighbour not in came_from and not self.locked[neighbour] and neighbour != avoid:
+                    came_from[neighbour] = cell
+                    queue.append(neighbour)
+        return None
+
+    def step(self, cell: int) -> int:
+        """
+        Moves the blank into a neighbouring cell
+        :param cell: the cell next to the blank
+        :return: the tile that was moved, which is the tile to click
+        """
+        blank = self.positions[self.num_of_tiles]
+        tile = self.tiles[cell]
+        self.tiles[blank] = tile
+        self.tiles[cell] = self.num_of_tiles
+        self.positions[tile] = blank
+        self.positions[self.num_of_tiles] = cell
+        self.moves_made += 1
+        if self.deadline is not None and self.moves_made % CLOCK_CHECK_MOVES == 0 and perf_counter() > self.deadline:
+            raise TimeoutError(f"no solution within {self.time_limit} seconds")
+        return tile
+
+
+if __name__ == '__main__':
+    from Model.model import Model
+
+    for length in (3, 4, 10, 30):
+        model = Model(length * length, seed=1)
+        solver = ReductionSolver(model, time_limit=60)
+        for move in solver.moves():
+            model.move_tile(move)
+        print(f"{length}x{length}: {solver.get_solution_length()} moves in {solver.elapsed:.3f}s, "
+              f"solved: {model.is_done()}")
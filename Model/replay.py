@@ -0,0 +1,245 @@
+"""
+replay.py
+This file contains the recording of games as compact binary replays and the verifier that checks them.
+"""
+
+import struct
+from itertools import chain, islice
+from time import perf_counter
+from Model.model import Model
+from Model.move_history import MOVES_PER_BYTE
+from Model.puzzle_validater import is_solvable
+
+MAGIC = b"PZR1"
+TIME_TOLERANCE = 0.5  # seconds a claimed time may be below the time recorded in the replay
+# the four directions packed in each possible byte, lowest bits first
+BYTE_DIRECTIONS = [tuple((byte >> shift) & 3 for shift in range(0, 8, 2)) for byte in range(256)]
+
+# Layout, little endian:
+#   magic, u16 length + utf-8 puzzle name, u16 length + utf-8 player name, u32 number of tiles,
+#   the initial board as u16 tiles (u32 past 65535 tiles), u64 number of moves,
+#   the moves as 2-bit directions of the blank packed 4 to a byte,
+#   the milliseconds between each move and the one before it as LEB128 varints, the first one from the first move
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """
+    This function appends an unsigned integer in 7-bit groups, the high bit marking that more follow
+    :param buffer: the buffer to append to
+    :param value: the integer
+    :return: None
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> tuple:
+    """
+    This function reads an unsigned integer written by write_varint
+    :param data: the bytes
+    :param offset: the position of the integer
+    :return: a tuple of the integer and the position after it
+    """
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("replay ends inside a timestamp")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def get_tile_format(num_of_tiles: int) -> str:
+    """
+    This function returns the struct format of one tile of the board
+    :param num_of_tiles: the number of tiles
+    :return: "H" or "I"
+    """
+    return "H" if num_of_tiles <= 0xFFFF else "I"
+
+
+class ReplayRecorder:
+    """
+    ReplayRecorder
+    This class records a game as it is played: the puzzle, the player and the initial board, then the direction the
+    blank moved in at every move along with the time since the move before. A Model records into it once it is set
+    as the recorder of the model.
+    """
+
+    def __init__(self, puzzle_name: str, player_name: str, board: list[int]) -> None:
+        """
+        Initializes the ReplayRecorder before the first move
+        :param puzzle_name: the name of the puzzle
+        :param player_name: the name of the player
+        :param board: the list of integers representing the initial board
+        """
+        self.puzzle_name = puzzle_name
+        self.player_name = player_name
+        self.board = list(board)
+        self.count = 0
+        self.directions = bytearray()
+        self.timestamps = bytearray()
+        self.last_time = None
+
+    def record(self, direction: int) -> None:
+        """
+        Records a move
+        :param direction: the direction the blank moved in
+        :return: None
+        """
+        now = perf_counter()
+        shift = (self.count & 3) << 1
+        if shift == 0:
+            self.directions.append(direction)
+        else:
+            self.directions[-1] |= direction << shift
+        write_varint(self.timestamps, 0 if self.last_time is None else round((now - self.last_time) * 1000))
+        self.last_time = now
+        self.count += 1
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the replay in its binary layout
+        :return: the bytes of the replay
+        """
+        name = self.puzzle_name.encode("utf-8")
+        player = self.player_name.encode("utf-8")
+        num_of_tiles = len(self.board)
+        return b"".join([MAGIC,
+                         struct.pack("<H", len(name)), name,
+                         struct.pack("<H", len(player)), player,
+                         struct.pack("<I", num_of_tiles),
+                         struct.pack(f"<{num_of_tiles}{get_tile_format(num_of_tiles)}", *self.board),
+                         struct.pack("<Q", self.count),
+                         bytes(self.directions),
+                         bytes(self.timestamps)])
+
+    def save(self, path: str) -> None:
+        """
+        Writes the replay to a file
+        :param path: the path of the file
+        :return: None
+        """
+        with open(path, mode="wb") as replay_file:
+            replay_file.write(self.to_bytes())
+
+
+class Replay:
+    """
+    Replay
+    This class holds a replay read back from its binary layout.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        """
+        Initializes the Replay by parsing the given bytes
+        :param data: the bytes of the replay
+        """
+        try:
+            if data[:4] != MAGIC:
+                raise ValueError("not a replay")
+            offset = 4
+            (length,) = struct.unpack_from("<H", data, offset)
+            self.puzzle_name = data[offset + 2:offset + 2 + length].decode("utf-8")
+            offset += 2 + length
+            (length,) = struct.unpack_from("<H", data, offset)
+            self.player_name = data[offset + 2:offset + 2 + length].decode("utf-8")
+            offset += 2 + length
+            (num_of_tiles,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            tile_format = f"<{num_of_tiles}{get_tile_format(num_of_tiles)}"
+            self.board = list(struct.unpack_from(tile_format, data, offset))
+            offset += struct.calcsize(tile_format)
+            (self.count,) = struct.unpack_from("<Q", data, offset)
+            offset += 8
+        except (struct.error, UnicodeDecodeError) as err:
+            raise ValueError(f"replay header is malformed: {err}")
+
+        end = offset + (self.count + MOVES_PER_BYTE - 1) // MOVES_PER_BYTE
+        if end > len(data):
+            raise ValueError("replay ends inside the moves")
+        self.directions = data[offset:end]
+        self.timestamps_offset = end
+        self.data = data
+
+    def get_directions(self):
+        """
+        Returns the directions of the moves in order
+        :return: an iterator of the directions
+        """
+        return islice(chain.from_iterable(map(BYTE_DIRECTIONS.__getitem__, self.directions)), self.count)
+
+    def get_duration(self) -> float:
+        """
+        Returns the seconds between the first and the last move
+        :return: the duration of the game
+        """
+        total = 0
+        offset = self.timestamps_offset
+        for _ in range(self.count):
+            delay, offset = read_varint(self.data, offset)
+            total += delay
+        if offset != len(self.data):
+            raise ValueError("replay has data past its last timestamp")
+        return total / 1000
+
+
+def verify_replay(data: bytes, moves=None, time=None, puzzle=None, player=None, num_of_tiles=None) -> Replay:
+    """
+    This function replays a game through the Model without drawing it and checks that it is a real win. The initial
+    board must be solvable, every move legal and the final board solved. If a score is given, the replay must be of
+    the same puzzle, player and board size, the move count must match and the time may not be shorter than the
+    recorded one.
+    :param data: the bytes of the replay
+    :param moves: the claimed number of moves, not checked if None
+    :param time: the claimed time in seconds, not checked if None
+    :param puzzle: the claimed puzzle name, not checked if None
+    :param player: the claimed player name, not checked if None
+    :param num_of_tiles: the number of tiles of the claimed puzzle, not checked if None
+    :return: the verified replay
+    """
+    replay = Replay(data)
+    if puzzle is not None and puzzle != replay.puzzle_name:
+        raise ValueError(f"score for {puzzle} but the replay is of {replay.puzzle_name}")
+    if player is not None and player != replay.player_name:
+        raise ValueError(f"score by {player} but the replay is by {replay.player_name}")
+    if num_of_tiles is not None and num_of_tiles != len(replay.board):
+        raise ValueError(f"score for {num_of_tiles} tiles but the replay of {replay.puzzle_name} has {len(replay.board)}")
+    if sorted(replay.board) != list(range(1, len(replay.board) + 1)):
+        raise ValueError("initial board is not a permutation of the tiles")
+    if not is_solvable(replay.board):
+        raise ValueError("initial board is not solvable")
+
+    model = Model(len(replay.board), seed=0)
+    model.set_puzzle(replay.board)
+    model.play_directions(replay.get_directions())
+    if not model.is_done():
+        raise ValueError("replay does not end with the puzzle solved")
+
+    if moves is not None and moves != replay.count:
+        raise ValueError(f"{moves} moves claimed but the replay has {replay.count}")
+    duration = replay.get_duration()
+    if time is not None and time < duration - TIME_TOLERANCE:
+        raise ValueError(f"{time} seconds claimed but the replay lasts {duration}")
+    return replay
+
+
+def verify_replay_file(path: str) -> dict:
+    """
+    This function verifies a replay file, for the bulk verification
+    :param path: the path of the replay
+    :return: a dictionary with the path, the status and either the replay details or the error
+    """
+    try:
+        with open(path, mode="rb") as replay_file:
+            replay = verify_replay(replay_file.read())
+        return {"path": path, "status": "ok", "puzzle": replay.puzzle_name, "player": replay.player_name,
+                "moves": replay.count, "time": replay.get_duration()}
+    except (OSError, ValueError) as err:
+        return {"path": path, "status": "invalid", "error": str(err)}
@@ -0,0 +1,299 @@
+"""
+solver.py
+This file contains the IDA* solver that finds an optimal move sequence for a fifteen puzzle board.
+"""
+
+from bisect import bisect_left
+from math import isqrt
+from time import perf_counter
+from Model.puzzle_validater import is_solvable
+from Model.distance_database import load_distance_database
+from Model.pattern_database import load_pattern_database
+
+FOUND = -1  # sentinel returned by the search once the goal has been reached
+CLOCK_CHECK_NODES = 4096  # how many nodes are expanded between checks of the time limit and cancellation
+
+databases = {}  # the read-only database loaded for each number of tiles, so its file is only opened once
+
+
+def get_database(num_of_tiles: int):
+    """
+    Returns the distance database or the pattern database of the board size, loading it the first time. The
+    database is shared by every caller, so searches take their own heuristic from its get_heuristic. A size without
+    a database is looked up again on the next call, so a database built while the game runs is picked up.
+    :param num_of_tiles: the number of tiles of the board
+    :return: the DistanceDatabase or PatternDatabase instance, or None if none has been built for the board size
+    """
+    database = databases.get(num_of_tiles)
+    if database is None:
+        database = load_distance_database(num_of_tiles) or load_pattern_database(num_of_tiles)
+        if database is not None:
+            databases[num_of_tiles] = database
+    return database
+
+
+class SearchCancelled(Exception):
+    """
+    SearchCancelled
+    This exception is raised by Solver.solve when the search is cancelled from another thread.
+    """
+
+
+def count_line_conflicts(goal_places: list[int]) -> int:
+    """
+    This function counts how many tiles of a row or column have to leave the line so that the remaining tiles are
+    in their goal order. It is the number of tiles minus the longest increasing subsequence of their goal places.
+    :param goal_places: the goal column (or row) of each tile in the line that belongs to the line, in board order
+    :return: the number of tiles that must leave the line
+    """
+    increasing = []
+    for place in goal_places:
+        index = bisect_left(increasing, place)
+        if index == len(increasing):
+            increasing.append(place)
+        else:
+            increasing[index] = place
+    return len(goal_places) - len(increasing)
+
+
+class LinearConflict:
+    """
+    LinearConflict
+    This class is the Manhattan distance plus linear conflict heuristic. It keeps the per row and per column conflicts
+    of the current board so that a single tile move only re-evaluates the two lines the tile moved between.
+    """
+
+    def __init__(self, length: int) -> None:
+        """
+        Initializes the heuristic for a length by length board
+        :param length: the number of tiles in a row of the board
+        """
+        self.length = length
+        self.num_of_tiles = length * length
+
+        # distance[tile][pos] is the Manhattan distance of the tile at pos to its goal position
+        self.distance = [[0] * self.num_of_tiles for _ in range(self.num_of_tiles + 1)]
+        for tile in range(1, self.num_of_tiles):
+            goal_row, goal_col = divmod(tile - 1, length)
+            for pos in range(self.num_of_tiles):
+                row, col = divmod(pos, length)
+                self.distance[tile][pos] = abs(row - goal_row) + abs(col - goal_col)
+
+        # the conflicts of a line only depend on its content so they are cached per line
+        self.row_cache = [{} for _ in range(length)]
+        self.col_cache = [{} for _ in range(length)]
+
+        self.manhattan = 0
+        self.row_conflicts = [0] * length
+        self.col_conflicts = [0] * length
+        self.conflicts = 0
+
+    def get_row_conflicts(self, tiles: list[int], row: int) -> int:
+        """
+        Returns the number of linear conflicts in the given row
+        :param tiles: the board
+        :param row: the index of the row
+        :return: the number of tiles that must leave the row
+        """
+        content = tuple(tiles[row * self.length:(row + 1) * self.length])
+        cache = self.row_cache[row]
+        if content not in cache:
+            cache[content] = count_line_conflicts([(tile - 1) % self.length for tile in content
+                                                   if tile != self.num_of_tiles
+                                                   and (tile - 1) // self.length == row])
+        return cache[content]
+
+    def get_col_conflicts(self, tiles: list[int], col: int) -> int:
+        """
+        Returns the number of linear conflicts in the given column
+        :param tiles: the board
+        :param col: the index of the column
+        :return: the number of tiles that must leave the column
+        """
+        content = tuple(tiles[col::self.length])
+        cache = self.col_cache[col]
+        if content not in cache:
+            cache[content] = count_line_conflicts([(tile - 1) // self.length for tile in content
+                                                   if tile != self.num_of_tiles
+                                                   and (tile - 1) % self.length == col])
+        return cache[content]
+
+    def reset(self, tiles: list[int]) -> int:
+        """
+        Evaluates the whole board and stores the per line state used by move
+        :param tiles: the board
+        :return: the estimated number of moves left
+        """
+        self.manhattan = sum(self.distance[tile][pos] for pos, tile in enumerate(tiles))
+        self.row_conflicts = [self.get_row_conflicts(tiles, row) for row in range(self.length)]
+        self.col_conflicts = [self.get_col_conflicts(tiles, col) for col in range(self.length)]
+        self.conflicts = sum(self.row_conflicts) + sum(self.col_conflicts)
+        return self.manhattan + 2 * self.conflicts
+
+    def move(self, tiles: list[int], tile: int, src: int, dst: int) -> int:
+        """
+        Updates the estimate after a tile has been moved from src to dst. The board must already hold the move.
+        Calling it again with src and dst swapped after undoing the move restores the previous state.
+        :param tiles: the board after the move
+        :param tile: the tile that was moved
+        :param src: the position the tile left
+        :param dst: the position the tile moved to
+        :return: the estimated number of moves left
+        """
+        self.manhattan += self.distance[tile][dst] - self.distance[tile][src]
+        src_row, src_col = divmod(src, self.length)
+        dst_row, dst_col = divmod(dst, self.length)
+
+        if src_row == dst_row:
+            # horizontal moves only change the content of the two columns
+            for col in (src_col, dst_col):
+                conflicts = self.get_col_conflicts(tiles, col)
+                self.conflicts += conflicts - self.col_conflicts[col]
+                self.col_conflicts[col] = conflicts
+        else:
+            for row in (src_row, dst_row):
+                conflicts = self.get_row_conflicts(tiles, row)
+                self.conflicts += conflicts - self.row_conflicts[row]
+                self.row_conflicts[row] = conflicts
+        return self.manhattan + 2 * self.conflicts
+
+
+class Solver:
+    """
+    Solver
+    This class finds an optimal sequence of tile moves that solves a puzzle using iterative deepening A* (IDA*).
+    It tracks the number of nodes expanded and the time taken by the last search.
+    """
+
+    def __init__(self, puzzle, heuristic=None) -> None:
+        """
+        Initializes the solver with the given puzzle
+        :param puzzle: a Model instance or the list of integers representing the puzzle
+        :param heuristic: the heuristic to guide the search. Defaults to the distance database or the pattern database
+        if one has been built for the board size, Manhattan distance plus linear conflict otherwise
+        """
+        if hasattr(puzzle, "get_puzzle"):
+            puzzle = puzzle.get_puzzle()
+        self.tiles = list(puzzle)
+        self.num_of_tiles = len(self.tiles)
+        self.length = isqrt(self.num_of_tiles)
+
+        if self.length * self.length != self.num_of_tiles:
+            raise ValueError("size of board must be a perfect squared value")
+        if sorted(self.tiles) != list(range(1, self.num_of_tiles + 1)):
+            raise ValueError("puzzle must contain each tile from 1 to the number of tiles exactly once")
+
+        if heuristic is None:
+            database = get_database(self.num_of_tiles)
+            heuristic = database.get_heuristic() if database is not None else LinearConflict(self.length)
+        self.heuristic = heuristic
+
+        # neighbours[pos] lists the positions the blank can move to from pos
+        self.neighbours = []
+        for pos in range(self.num_of_tiles):
+            row, col = divmod(pos, self.length)
+            self.neighbours.append(tuple(row * self.length + c for c in (col - 1, col + 1) if 0 <= c < self.length) +
+                                   tuple(r * self.length + col for r in (row - 1, row + 1) if 0 <= r < self.length))
+
+        self.nodes_expanded = 0
+        self.elapsed = 0.0
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """
+        Asks a running search to stop. It is safe to call from another thread; the search raises SearchCancelled.
+        :return: None
+        """
+        self.cancelled = True
+
+    def solve(self, time_limit=None) -> list[int]:
+        """
+        Searches for an optimal solution of the puzzle. A TimeoutError is raised if the time limit runs out first.
+        :param time_limit: the number of seconds the search may take. No limit if not given
+        :return: the list of tiles to move, in order, to solve the puzzle
+        """
+        if not is_solvable(self.tiles):
+            raise ValueError("puzzle is not solvable")
+
+        tiles = self.tiles.copy()
+        blank_tile = self.num_of_tiles
+        neighbours = self.neighbours
+        move = self.heuristic.move
+        path = []
+        nodes = 0
+
+        def search(blank: int, previous: int, g: int, h: int, bound: int) -> int:
+            nonlocal nodes
+            if h == 0:
+                return FOUND
+            nodes += 1
+            if nodes % CLOCK_CHECK_NODES == 0:
+                if self.cancelled:
+                    raise SearchCancelled("the search was cancelled")
+                if deadline is not None and perf_counter() > deadline:
+                    raise TimeoutError(f"no solution found within {time_limit} seconds")
+            minimum = None
+            for pos in neighbours[blank]:
+                if pos == previous:
+                    continue
+                tile = tiles[pos]
+                tiles[blank], tiles[pos] = tile, blank_tile
+                new_h = move(tiles, tile, pos, blank)
+
+                if g + 1 + new_h > bound:
+                    result = g + 1 + new_h
+                else:
+                    path.append(tile)
+                    result = search(pos, blank, g + 1, new_h, bound)
+                    if result == FOUND:
+                        return FOUND
+                    path.pop()
+
+                tiles[blank], tiles[pos] = blank_tile, tile
+                move(tiles, tile, blank, pos)
+                if minimum is None or result < minimum:
+                    minimum = result
+            return minimum
+
+        start = perf_counter()
+        deadline = start + time_limit if time_limit is not None else None
+        h = self.heuristic.reset(tiles)
+        bound = h
+        blank = tiles.index(blank_tile)
+        try:
+            while True:
+                result = search(blank, -1, 0, h, bound)
+                if result == FOUND:
+                    break
+                bound = result
+        finally:
+            self.nodes_expanded = nodes
+            self.elapsed = perf_counter() - start
+        return path
+
+    def get_nodes_expanded(self) -> int:
+        """
+        Returns the number of nodes expanded by the last search
+        :return: the number of nodes expanded by the last search
+        """
+        return self.nodes_expanded
+
+    def get_nodes_per_second(self) -> float:
+        """
+        Returns the throughput of the last search
+        :return: the number of nodes expanded per second by the last search
+        """
+        if self.elapsed == 0:
+            return 0.0
+        return self.nodes_expanded / self.elapsed
+
+
+if __name__ == '__main__':
+    puzzle1 = [
+        5, 1, 3, 4,
+        9, 2, 7, 8,
+        13, 6, 10, 11,
+        16, 14, 15, 12]
+    solver = Solver(puzzle1)
+    print(solver.solve())
+    print(f"{solver.get_nodes_expanded()} nodes at {solver.get_nodes_per_second():.0f} nodes/s")
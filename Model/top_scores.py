@@ -0,0 +1,101 @@
+"""
+top_scores.py
+This file contains the TopScores class that keeps the best scores of a puzzle in order.
+"""
+
+from bisect import bisect_right
+
+
+class TopScores:
+    """
+    TopScores
+    This class keeps the best scores of a puzzle sorted by the number of moves and then by the time, as the
+    leaderboard shows them. A score ties after the equal scores already kept, so older scores stay ahead. Only the
+    given number of scores is kept. The rank of a new score is found by binary search over the sort keys, so
+    checking a score never copies or scans the board. Iterating gives the [player, moves, time] entries best first.
+    """
+
+    def __init__(self, capacity: int, entries=()) -> None:
+        """
+        Initializes the TopScores
+        :param capacity: the maximum number of scores kept
+        :param entries: the [player, moves, time] entries to start with, in any order
+        """
+        if capacity < 1:
+            raise ValueError("the leaderboard must keep at least one score")
+        self.capacity = capacity
+        self.keys = []  # (moves, time) of each kept score, sorted
+        self.entries = []  # [player, moves, time] of each kept score, in the same order as keys
+        for entry in entries:
+            self.add(entry[0], entry[1], entry[2])
+
+    def get_rank(self, moves: int, time: float):
+        """
+        Returns the position a score would take on the board
+        :param moves: the number of moves of the score
+        :param time: the time of the score in seconds
+        :return: the 0 based position, or None if the score would not be kept
+        """
+        rank = bisect_right(self.keys, (moves, time))
+        if rank >= self.capacity:
+            return None
+        return rank
+
+    def qualifies(self, moves: int, time: float) -> bool:
+        """
+        Returns whether a score would be kept on the board
+        :param moves: the number of moves of the score
+        :param time: the time of the score in seconds
+        :return: True if the score would be kept. False otherwise
+        """
+        return self.get_rank(moves, time) is not None
+
+    def is_record(self, moves: int, time: float) -> bool:
+        """
+        Returns whether a score would beat every kept score
+        :param moves: the number of moves of the score
+        :param time: the time of the score in seconds
+        :return: True if the score would be first on the board. False otherwise
+        """
+        return self.get_rank(moves, time) == 0
+
+    def add(self, player: str, moves: int, time: float):
+        """
+        Adds a score if it is good enough to be kept, dropping the last score if the board is full
+        :param player: the name of the player
+        :param moves: the number of moves of the score
+        :param time: the time of the score in seconds
+        :return: the 0 based position of the score, or None if it was not kept
+        """
+        rank = self.get_rank(moves, time)
+        if rank is None:
+            return None
+        self.keys.insert(rank, (moves, time))
+        self.entries.insert(rank, [player, moves, time])
+        if len(self.keys) > self.capacity:
+            self.keys.pop()
+            self.entries.pop()
+        return rank
+
+    def get_top(self, count: int) -> list:
+        """
+        Returns the best scores
+        :param count: the maximum number of scores
+        :return: a list of the [player, moves, time] entries, best first
+        """
+        return self.entries[:count]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+
+if __name__ == '__main__':
+    scores = TopScores(3, [["a", 5, 2.0], ["b", 3, 9.0]])
+    print(scores.add("c", 3, 1.0), scores.add("d", 9, 1.0), scores.add("e", 10, 1.0), scores.entries)
+    print(scores.is_record(2, 50.0), scores.qualifies(9, 2.0))
@@ -0,0 +1,94 @@
+"""
+test_model.py
+This file contains the tests of the move history of the Model after moves played from directions.
+
+Run them from the repository root with: python -m pytest Tests
+"""
+
+import unittest
+from random import Random
+from Model.model import Model
+from Model.move_history import UP, DOWN, LEFT, RIGHT, get_offset
+
+MOVES = 5000  # more than a checkpoint interval, so the played moves cross several checkpoints
+
+
+def get_random_directions(model: Model, count: int, seed: int) -> list[int]:
+    """
+    Returns random legal directions for the blank of the given board, without moving it
+    :param model: the board to start from
+    :param count: the number of directions
+    :param seed: the seed of the random number generator
+    :return: the list of directions
+    """
+    rng = Random(seed)
+    blank = model.blank
+    directions = []
+    for _ in range(count):
+        options = [(direction, pos) for pos, direction in model.directions.items()
+                   if 0 <= blank + pos < model.num_of_tiles and
+                   (abs(pos) == model.length or (blank + pos) // model.length == blank // model.length)]
+        direction, pos = rng.choice(options)
+        directions.append(direction)
+        blank += pos
+    return directions
+
+
+def play_one_at_a_time(model: Model, directions: list[int]) -> None:
+    """
+    Plays the directions with move_tile, which pushes every move to the history on its own
+    :param model: the board to play on
+    :param directions: the directions the blank moves in
+    :return: None
+    """
+    for direction in directions:
+        model.move_tile(model.tiles[model.blank + get_offset(direction, model.length)])
+
+
+class TestPlayDirections(unittest.TestCase):
+    """
+    TestPlayDirections
+    This class checks that moves played with play_directions are in the history like moves made with move_tile
+    """
+
+    def setUp(self) -> None:
+        self.model = Model(16, seed=1)
+        self.expected = Model(16, seed=1)
+        self.directions = get_random_directions(self.model, MOVES, 2)
+
+    def test_history_matches_move_tile(self) -> None:
+        self.model.play_directions(self.directions)
+        play_one_at_a_time(self.expected, self.directions)
+
+        self.assertEqual(self.model.get_puzzle(), self.expected.get_puzzle())
+        self.assertEqual(self.model.history.directions, self.expected.history.directions)
+        self.assertEqual(self.model.history.checkpoints, self.expected.history.checkpoints)
+        self.assertEqual(len(self.model.history), MOVES)
+
+    def test_undo_after_play_directions(self) -> None:
+        start = self.model.get_puzzle()
+        self.model.play_directions(self.directions)
+        while self.model.undo() is not None:
+            pass
+        self.assertEqual(self.model.get_puzzle(), start)
+
+    def test_go_to_move_after_play_directions(self) -> None:
+        self.model.play_directions(self.directions[:MOVES // 2])
+        halfway = self.model.get_puzzle()
+        self.model.play_directions(self.directions[MOVES // 2:])
+        self.model.go_to_move(MOVES // 2)
+        self.assertEqual(self.model.get_puzzle(), halfway)
+        self.assertIsNotNone(self.model.redo())
+
+    def test_illegal_move_keeps_history(self) -> None:
+        solved = list(range(1, 17))
+        self.model.set_puzzle(solved)
+        # the blank goes left and back to the bottom right corner, then cannot go further down
+        with self.assertRaises(ValueError):
+            self.model.play_directions([LEFT, UP, DOWN, RIGHT, DOWN])
+        self.assertEqual(self.model.get_puzzle(), solved)
+        self.assertEqual(self.model.history.get_directions(), [LEFT, UP, DOWN, RIGHT])
+        self.assertEqual(self.model.get_play_count(), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+test_solver.py
+This file contains the tests of the Solver sharing one loaded pattern database between searches.
+
+Run them from the repository root with: python -m pytest Tests
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from random import Random
+from Model.board_generator import generate_board
+from Model.pattern_database import PatternDatabase, build_database
+from Model.solver import Solver, LinearConflict, databases
+
+BOARDS_PER_THREAD = 20
+THREADS = 4
+SWITCH_INTERVAL = 1e-6  # seconds between thread switches, short so that the searches interleave move by move
+
+
+class TestSharedDatabase(unittest.TestCase):
+    """
+    TestSharedDatabase
+    This class checks that solvers running at the same time on one cached pattern database find optimal solutions
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "eight.pdb")
+        build_database(path, ((1, 2, 3, 4), (5, 6, 7, 8)), length=3)
+        # the database the solvers of 9 tile boards load, in place of the distance database
+        self.saved = databases.get(9)
+        databases[9] = PatternDatabase(path)
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(SWITCH_INTERVAL)
+
+    def tearDown(self) -> None:
+        sys.setswitchinterval(self.switch_interval)
+        databases.pop(9)
+        if self.saved is not None:
+            databases[9] = self.saved
+        self.directory.cleanup()
+
+    def test_solvers_at_once(self) -> None:
+        rng = Random(1)
+        boards = [[generate_board(9, rng) for _ in range(BOARDS_PER_THREAD)] for _ in range(THREADS)]
+        results = [[] for _ in range(THREADS)]
+        errors = []
+
+        def solve(thread_boards: list, thread_results: list) -> None:
+            try:
+                for board in thread_boards:
+                    thread_results.append(len(Solver(board).solve()))
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=solve, args=(boards[number], results[number]))
+                   for number in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for thread_boards, thread_results in zip(boards, results):
+            expected = [len(Solver(board, LinearConflict(3)).solve()) for board in thread_boards]
+            self.assertEqual(thread_results, expected)
+
+    def test_solvers_have_own_heuristic(self) -> None:
+        first = Solver(generate_board(9, Random(2)))
+        second = Solver(generate_board(9, Random(3)))
+        self.assertIsNot(first.heuristic, second.heuristic)
+        self.assertIs(first.heuristic.table, second.heuristic.table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@ button.py
 Contains the button class turtle.Turtle child class.
 """
 
-from turtle import Turtle, Screen, done, update
+from turtle import Turtle, Screen, done
 
 
 class Button(Turtle):
@@ -30,7 +30,6 @@ class Button(Turtle):
         self.speed('fastest')
         self.penup()
         self.goto(x, y)
-        update()
 
         # set the default bound function
         self.funct = lambda: print("Button pressed")
@@ -1,7 +1,16 @@
+import os
+import sqlite3
+from time import time_ns
+from turtle import Turtle
 from View.border import Border
 from Controller.error_logger import log_error
+from Controller.metrics import timed
+from Model.leaderboard_store import LeaderboardStore, LEADERBOARD_DB_PATH
+from Model.top_scores import TopScores
+from Model.replay import verify_replay
 
-LEADERBOARD_PATH = "./leaderboard.txt"
+LEADERBOARD_PATH = "./leaderboard.txt"  # the old text leaderboard, imported into the database once
+REPLAYS_PATH = "./Replays/"  # directory where the replays of accepted scores are kept
 MAX_NUM_LEADERS = 10
 OFFSET = 20
 FONT_SIZE = 36
@@ -25,77 +34,170 @@ class Leaderboard(Border):
         super().__init__(width, height, x=x, y=y)
 
         self.puzzle_leader_data = {}
+        self.store = None
         self.load_data()
 
-    def load_data(self) -> None:
+        # what is on screen: each row has its own hidden turtle so that it can be cleared and written on its own
+        self.shown_puzzle = None
+        self.title_shown = False
+        self.rows = []
+        self.row_texts = []
+        self.row_writes = 0
 
+    def load_data(self) -> None:
+        """
+        Opens the leaderboard database and reads the best entries of every puzzle. The old leaderboard.txt is
+        imported into the database the first time.
+        :return: None
+        """
         # each entry is stored as [puzzle name, player_name, play count, time]
         try:
-            with open(LEADERBOARD_PATH, mode="r", encoding='utf-8') as raw_data:
-                for entry in raw_data:
-                    l = entry.split()
-                    if l[0] not in self.puzzle_leader_data.keys():
-                        self.puzzle_leader_data[l[0]] = []
-                    # append the name
-                    self.puzzle_leader_data[l[0]].append([l[1], int(l[2]), float(l[3])])
+            self.store = LeaderboardStore(LEADERBOARD_DB_PATH, legacy_path=LEADERBOARD_PATH)
+            self.puzzle_leader_data = {puzzle: TopScores(MAX_NUM_LEADERS, entries)
+                                       for puzzle, entries in self.store.get_all_top(MAX_NUM_LEADERS).items()}
             print(self.puzzle_leader_data)
-        except FileNotFoundError as err:
+        except sqlite3.Error as err:
             print("error")
-            log_error(f"{err} \t {LEADERBOARD_PATH} not found.")
+            log_error(f"{err} \t {LEADERBOARD_DB_PATH} could not be opened.")
+
+    def record_entry(self, entry: list) -> None:
+        """
+        Appends a finished game to the leaderboard database, whether it makes the top of the leaderboard or not
+        :param entry: the entry as [puzzle name, player name, play count, time]
+        :return: None
+        """
+        if self.store is None:
+            return
+        try:
+            self.store.add(entry[0], entry[1], entry[2], entry[3])
+        except sqlite3.Error as err:
+            log_error(f"{err} \t entry {entry} could not be saved.")
 
-    def add_entry(self, entry: list) -> None:
+    @timed("leaderboard_add_entry")
+    def add_entry(self, entry: list, replay: bytes, num_of_tiles=None) -> bool:
+        """
+        Records a finished game and adds it to the leaderboard of its puzzle if it is one of the best scores. The
+        score is only accepted if the replay of the game is of the same puzzle and player and shows the puzzle solved
+        in the claimed number of moves; the replay is then kept in the replays directory.
+        :param entry: the entry as [puzzle name, player name, play count, time]
+        :param replay: the bytes of the replay of the game
+        :param num_of_tiles: the number of tiles of the puzzle, which the replay board must have. Not checked if None
+        :return: True if the score was accepted. False otherwise
+        """
         print(entry)
+        try:
+            verify_replay(replay, entry[2], entry[3], entry[0], entry[1], num_of_tiles)
+        except ValueError as err:
+            log_error(f"{err} \t entry {entry} rejected.")
+            return False
+        self.save_replay(entry[0], replay)
+        self.record_entry(entry)
         # ensure that the puzzle is within the data structure
         if entry[0] not in self.puzzle_leader_data.keys():
             print("new entry")
-            self.puzzle_leader_data[entry[0]] = []
+            self.puzzle_leader_data[entry[0]] = TopScores(MAX_NUM_LEADERS)
+        if self.puzzle_leader_data[entry[0]].add(entry[1], entry[2], entry[3]) is not None \
+                and entry[0] == self.shown_puzzle:
+            self.refresh()
+        return True
 
-        # create a working copy
-        current_puzzle_leaders = self.puzzle_leader_data[entry[0]].copy()
+    def save_replay(self, puzzle: str, replay: bytes) -> None:
+        """
+        Keeps the replay of an accepted score so that the leaderboard can be checked again later
+        :param puzzle: the name of the puzzle
+        :param replay: the bytes of the replay
+        :return: None
+        """
+        try:
+            os.makedirs(REPLAYS_PATH, exist_ok=True)
+            with open(f"{REPLAYS_PATH}{puzzle}-{time_ns()}.replay", mode="wb") as replay_file:
+                replay_file.write(replay)
+        except OSError as err:
+            log_error(f"{err} \t replay of {puzzle} could not be saved.")
 
-        if len(current_puzzle_leaders) == 0:
-            self.puzzle_leader_data[entry[0]].append(entry[1:])
-            self.export_data()
-            return
-        count = 0
-        for leader in range(len(current_puzzle_leaders)):
-            # only change the current data if it is a new record
-
-            if current_puzzle_leaders[leader][1] >= entry[2] and current_puzzle_leaders[leader][2] >= entry[3]:
-                self.puzzle_leader_data[entry[0]] = current_puzzle_leaders[:leader]
-                self.puzzle_leader_data[entry[0]].append(entry[1:])
-                self.puzzle_leader_data[entry[0]].extend(current_puzzle_leaders[leader:MAX_NUM_LEADERS - 1])
-                self.export_data()
-                return
-            count += 1
-
-        if count < 10:
-            self.puzzle_leader_data[entry[0]].append(entry[1:])
-            self.export_data()
+    def is_record(self, puzzle: str, moves: int, time: float) -> bool:
+        """
+        Returns whether a score would be first on the leaderboard of a puzzle
+        :param puzzle: the name of the puzzle
+        :param moves: the number of moves of the score
+        :param time: the time of the score in seconds
+        :return: True if the score would be first. False otherwise
+        """
+        if puzzle not in self.puzzle_leader_data.keys():
+            return True
+        return self.puzzle_leader_data[puzzle].is_record(moves, time)
 
+    @timed("leaderboard_export_data")
     def export_data(self):
+        """
+        Writes the leaderboards shown in the game to leaderboard.txt as a readable copy. The database is the store
+        that is kept up to date, so this is not needed to save a score.
+        :return: None
+        """
         with open(LEADERBOARD_PATH, mode="w", encoding='utf-8') as raw_data:
             for puzzle in self.puzzle_leader_data.keys():
                 for entry in self.puzzle_leader_data[puzzle]:
                     raw_data.write('\t'.join([puzzle, str(entry[0]), str(entry[1]), str(round(entry[2], 2))]) + "\n")
 
-    def show_leaderboard(self, puzzle):
-        x, y = self.get_point("top-left", -OFFSET, -2 * OFFSET)
-        self.setpos(x, y)
-        self.write("Leaderboard", font=TITLE_FONT)
-        if puzzle not in self.puzzle_leader_data.keys():
-            return
-        for entry in self.puzzle_leader_data[puzzle]:
-            y = y - OFFSET
+    def show_leaderboard(self, puzzle) -> None:
+        """
+        Shows the leaderboard of the given puzzle. Only the rows that differ from what is on screen are redrawn, and
+        the rows left over from the previous puzzle are cleared.
+        :param puzzle: the name of the puzzle
+        :return: None
+        """
+        if not self.title_shown:
+            x, y = self.get_point("top-left", -OFFSET, -2 * OFFSET)
             self.setpos(x, y)
-            text = '\t'.join([str(entry[0]), str(entry[1]), str(entry[2])])
-            self.write(text, font=ENTRY_FONT)
+            self.write("Leaderboard", font=TITLE_FONT)
+            self.title_shown = True
+        self.shown_puzzle = puzzle
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Redraws the rows of the shown puzzle whose text changed
+        :return: None
+        """
+        texts = []
+        if self.shown_puzzle in self.puzzle_leader_data.keys():
+            texts = ['\t'.join([str(entry[0]), str(entry[1]), str(round(entry[2], 2))])
+                     for entry in self.puzzle_leader_data[self.shown_puzzle]]
+        for rank in range(max(len(texts), len(self.row_texts))):
+            self.set_row(rank, texts[rank] if rank < len(texts) else "")
+
+    def set_row(self, rank: int, text: str) -> None:
+        """
+        Shows the given text on a row, leaving the row untouched if it already shows it
+        :param rank: the 0 based row
+        :param text: the text of the row, empty to clear it
+        :return: None
+        """
+        if rank == len(self.rows):
+            x, y = self.get_point("top-left", -OFFSET, -2 * OFFSET)
+            row = Turtle(visible=False)
+            row.penup()
+            row.setpos(x, y - (rank + 1) * OFFSET)
+            self.rows.append(row)
+            self.row_texts.append("")
+        if self.row_texts[rank] == text:
+            return
+        self.rows[rank].clear()
+        if text:
+            self.rows[rank].write(text, font=ENTRY_FONT)
+            self.row_writes += 1
+        self.row_texts[rank] = text
 
 if __name__ == '__main__':
     l = Leaderboard(10, 10)
     print(l.puzzle_leader_data)
 
-    l.add_entry(["test", "justin", 50, 40])
+    # a game won in one move: the blank moves right onto the last place
+    from Model.replay import ReplayRecorder
+    from Model.move_history import RIGHT
+    recorder = ReplayRecorder("test", "justin", [1, 2, 3, 4, 5, 6, 7, 9, 8])
+    recorder.record(RIGHT)
+    l.add_entry(["test", "justin", 1, 0.0], recorder.to_bytes(), 9)
     print(l.puzzle_leader_data)
     l.export_data()
 
@@ -0,0 +1,66 @@
+"""
+renderer.py
+Contains the Renderer class that batches the screen updates of the game into frames.
+"""
+
+from contextlib import contextmanager
+from Controller.metrics import count
+
+
+class Renderer:
+    """
+    Renderer
+    This class turns off the automatic tracing of the turtle screen so that drawing a turtle no longer redraws the
+    screen. The changes made while handling an action are collected in a frame and shown with a single screen update
+    when the frame ends. With the metrics on, the frames, the screen updates and the frames that needed more than one
+    update are counted, so the single update per frame can be checked.
+    """
+
+    def __init__(self, screen) -> None:
+        """
+        Initializes the Renderer for the given screen and turns off its automatic tracing
+        :param screen: the turtle screen to render
+        """
+        self.screen = screen
+        self.screen.tracer(0)
+        self.is_open = True
+
+        self.depth = 0  # frames can be nested, only the outermost one updates the screen
+        self.flushes = 0  # screen updates made during the current frame
+
+    @contextmanager
+    def frame(self):
+        """
+        Collects the changes made in the with block and shows them with one screen update at its end
+        :return: a context manager for the frame
+        """
+        if self.depth == 0:
+            self.flushes = 0
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                self.flush()
+                count("frames")
+                if self.flushes > 1:
+                    count("frames_with_extra_updates")
+
+    def flush(self) -> None:
+        """
+        Updates the screen with every change made since the last update
+        :return: None
+        """
+        if not self.is_open:
+            return
+        self.screen.update()
+        self.flushes += 1
+        count("screen_updates")
+
+    def close(self) -> None:
+        """
+        Stops updating the screen, used before the window is closed
+        :return: None
+        """
+        self.is_open = False
@@ -19,6 +19,7 @@ BUTTON_WIDTH = 80
 RESET_BUTTON_HEIGHT = 80
 LOAD_BUTTON_HEIGHT = 76
 QUIT_BUTTON_HEIGHT = 75
+TEXT_BUTTON_HEIGHT = 40
 
 if __name__ == '__main__':
     for path in os.listdir("../Resources"):
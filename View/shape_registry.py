@@ -0,0 +1,124 @@
+"""
+shape_registry.py
+Contains the ShapeRegistry class that decodes and registers the gif shapes of the game at most once.
+"""
+
+from collections import OrderedDict, deque
+
+SHAPE_MEMORY_BUDGET = 64 * 1024 * 1024  # estimated bytes of decoded images kept before old shapes are evicted
+BYTES_PER_PIXEL = 4
+PRELOAD_INTERVAL = 1  # milliseconds between two shapes decoded in the background
+
+
+def get_image_memory(path: str) -> int:
+    """
+    This function estimates the memory used by a decoded gif from the width and height in its header
+    :param path: the path of the gif
+    :return: the estimated number of bytes
+    """
+    with open(path, mode="rb") as image_file:
+        header = image_file.read(10)
+    width = int.from_bytes(header[6:8], "little")
+    height = int.from_bytes(header[8:10], "little")
+    return width * height * BYTES_PER_PIXEL
+
+
+class ShapeRegistry:
+    """
+    ShapeRegistry
+    This class registers gif shapes on the turtle screen lazily, the first time they are used, and never decodes the
+    same path twice while it is registered. Shapes can be preloaded in the background between events. Once the
+    decoded images exceed the memory budget, the least recently used shapes that no turtle uses are evicted. Each use of
+    a shape is counted, so a shape shared by several turtles stays registered until every one of them released it.
+    """
+
+    def __init__(self, screen, budget=SHAPE_MEMORY_BUDGET) -> None:
+        """
+        Initializes the ShapeRegistry for the given screen
+        :param screen: the turtle screen the shapes are registered on
+        :param budget: the estimated number of bytes of decoded images to keep
+        """
+        self.screen = screen
+        self.budget = budget
+        self.shapes = OrderedDict()  # path: estimated memory, from least to most recently used
+        self.memory = 0
+        self.in_use = {}  # path: number of turtles using the shape
+        self.queue = deque()
+        self.decodes = 0
+
+    def get(self, path: str) -> str:
+        """
+        Returns the shape name of the given gif, registering it first if needed. Each call counts as one more use of
+        the shape until it is released.
+        :param path: the path of the gif
+        :return: the name of the shape to give to a turtle
+        """
+        if path in self.shapes:
+            self.shapes.move_to_end(path)
+        else:
+            self.register(path)
+        self.in_use[path] = self.in_use.get(path, 0) + 1
+        self.evict()
+        return path
+
+    def register(self, path: str) -> None:
+        """
+        Decodes the gif and registers it on the screen as the most recently used shape
+        :param path: the path of the gif
+        :return: None
+        """
+        self.screen.addshape(path)
+        self.decodes += 1
+        self.shapes[path] = get_image_memory(path)
+        self.memory += self.shapes[path]
+
+    def release(self, path: str) -> None:
+        """
+        Marks one use of a shape as over. The shape can be evicted once no turtle uses it.
+        :param path: the path of the gif
+        :return: None
+        """
+        uses = self.in_use.get(path, 0)
+        if uses > 1:
+            self.in_use[path] = uses - 1
+        else:
+            # shapes that were not taken from the registry, like the blank tile's, are not counted
+            self.in_use.pop(path, None)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Unregisters the least recently used shapes that are not in use until the memory budget is met
+        :return: None
+        """
+        for path in list(self.shapes):
+            if self.memory <= self.budget:
+                return
+            if path in self.in_use:
+                continue
+            self.memory -= self.shapes.pop(path)
+            # turtle has no public way to unregister a shape
+            self.screen._shapes.pop(path, None)
+
+    def preload(self, paths) -> None:
+        """
+        Decodes the given gifs in the background, one per turtle timer event, so the game keeps responding
+        :param paths: the paths of the gifs
+        :return: None
+        """
+        was_idle = len(self.queue) == 0
+        self.queue.extend(path for path in paths if path not in self.shapes)
+        if was_idle and self.queue:
+            self.screen.ontimer(self.preload_next, PRELOAD_INTERVAL)
+
+    def preload_next(self) -> None:
+        """
+        Decodes the next queued gif
+        :return: None
+        """
+        path = self.queue.popleft()
+        if path not in self.shapes:
+            self.register(path)
+            self.evict()
+        if self.queue:
+            self.screen.ontimer(self.preload_next, PRELOAD_INTERVAL)
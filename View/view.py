@@ -3,8 +3,10 @@ import turtle
 from View.button import Button
 from View.border import Border
 from View.leaderboard import Leaderboard
+from View.renderer import Renderer
+from View.shape_registry import ShapeRegistry
 import View.resource_file_constants as rfc
-import os
+from Controller.metrics import timed
 
 # Spacing constants
 WIDTH = 1000
@@ -16,8 +18,14 @@ SPACING = 5
 
 # Design constants
 AREA_COLOR = "#e64040"
+BUTTON_COLOR = "#ffffff"
+HINT_COLOR = "#ffd700"
 FONT_SIZE = 50
 FONT = ('Arial', FONT_SIZE, 'normal')
+BUTTON_FONT_SIZE = 16
+BUTTON_FONT = ('Arial', BUTTON_FONT_SIZE, 'bold')
+MESSAGE_FONT_SIZE = 14
+MESSAGE_FONT = ('Arial', MESSAGE_FONT_SIZE, 'normal')
 
 
 class View:
@@ -28,6 +36,9 @@ class View:
         self.tiles = {}
         self.tile_locations = []
         self.tile_utility = None
+        self.hint_marker = None
+        self.message_area = None
+        self.message_shown = False
         self.tile_size = None
         self.thumbnail_area = None
         self.control_area = None
@@ -38,11 +49,17 @@ class View:
         self.quit_button = None
         self.reset_button = None
         self.load_button = None
+        self.hint_button = None
+        self.solve_button = None
+        self.undo_button = None
+        self.redo_button = None
 
         self.screen = turtle.Screen()
         self.screen.setup(WIDTH, HEIGHT)
-
-        self.load_resources()
+        # all drawing is shown once per frame by the renderer
+        self.renderer = Renderer(self.screen)
+        # images are decoded the first time they are used
+        self.shapes = ShapeRegistry(self.screen)
 
     def get_player_name(self) -> str:
         """
@@ -80,16 +97,12 @@ class View:
         self.control_area.draw_rectangle(fillcolor=AREA_COLOR)
 
         leaderboard_height = board_height - (6 * PADDING + control_height + thumbnail_length)
-        self.leaderboard_area = Leaderboard(thumbnail_length, leaderboard_height)
-        self.leaderboard_area.set_point(self.thumbnail_area.get_point(point="bottom-left", y_offset=2 * PADDING))
-        self.leaderboard_area.draw_rectangle(fillcolor=AREA_COLOR)
-
-        turtle.update()
-
-    def load_resources(self):
-        for resource in os.listdir("./Resources"):
-            if ".gif" in resource:
-                self.screen.addshape("./Resources/" + resource)
+        # the leaderboard panel is kept between games and only redraws the rows that change
+        if self.leaderboard_area is None:
+            self.leaderboard_area = Leaderboard(thumbnail_length, leaderboard_height)
+            self.leaderboard_area.set_point(self.thumbnail_area.get_point(point="bottom-left",
+                                                                          y_offset=2 * PADDING))
+            self.leaderboard_area.draw_rectangle(fillcolor=AREA_COLOR)
 
     def add_buttons(self):
 
@@ -100,32 +113,64 @@ class View:
         y = y - self.control_area.get_height() / 2
         x = x - PADDING - rfc.BUTTON_WIDTH / 2
         self.quit_button = Button(rfc.BUTTON_WIDTH, rfc.QUIT_BUTTON_HEIGHT, x, y,
-                                  shape=rfc.QUIT_BUTTON, visible=False)
+                                  shape=self.shapes.get(rfc.QUIT_BUTTON), visible=False)
         self.quit_button.showturtle()
-        self.quit_button.bind_function(turtle.bye)
+        self.quit_button.bind_function(self.quit)
 
         # calculate reset button position
         x = x - PADDING - rfc.BUTTON_WIDTH
         self.reset_button = Button(rfc.BUTTON_WIDTH, rfc.RESET_BUTTON_HEIGHT, x, y,
-                                   shape=rfc.RESET_BUTTON, visible=False)
+                                   shape=self.shapes.get(rfc.RESET_BUTTON), visible=False)
         self.reset_button.showturtle()
         self.reset_button.bind_function(self.return_home)
 
         # calculate load button position
         x = x - PADDING - rfc.BUTTON_WIDTH
         self.load_button = Button(rfc.BUTTON_WIDTH, rfc.LOAD_BUTTON_HEIGHT, x, y,
-                                  shape=rfc.LOAD_BUTTON, visible=False)
+                                  shape=self.shapes.get(rfc.LOAD_BUTTON), visible=False)
         self.load_button.showturtle()
 
+        # calculate hint button position
+        x = x - PADDING - rfc.BUTTON_WIDTH
+        self.hint_button = self.create_text_button("Hint", x, y)
+
+        # calculate solve button position
+        x = x - PADDING - rfc.BUTTON_WIDTH
+        self.solve_button = self.create_text_button("Solve", x, y)
+
+        # calculate undo and redo button positions, one above the other
+        x = x - PADDING - rfc.BUTTON_WIDTH
+        self.undo_button = self.create_text_button("Undo", x, y + rfc.TEXT_BUTTON_HEIGHT / 2 + PADDING / 2)
+        self.redo_button = self.create_text_button("Redo", x, y - rfc.TEXT_BUTTON_HEIGHT / 2 - PADDING / 2)
+
+    def create_text_button(self, label: str, x, y) -> Border:
+        """
+        This function creates a button drawn as a filled rectangle with a text label, for the controls that do not
+        have an image
+        :param label: the text of the button
+        :param x: the center x coordinate of the button
+        :param y: the center y coordinate of the button
+        :return: the Border representing the button
+        """
+        button = Border(rfc.BUTTON_WIDTH, rfc.TEXT_BUTTON_HEIGHT, x, y)
+        button.draw_rectangle(fillcolor=BUTTON_COLOR)
+        button.setpos(x, y - BUTTON_FONT_SIZE * 0.75)
+        button.write(label, align="center", font=BUTTON_FONT)
+        # the button must be back at its center for is_clicked
+        button.setpos(x, y)
+        return button
+
     def set_puzzle(self, puz_data: dict):
         self.puz_data = puz_data
         self.tile_size = puz_data["size"]
         self.tile_utility = Border(self.tile_size + SPACING / 2, self.tile_size + SPACING / 2)
+        self.hint_marker = Border(self.tile_size, self.tile_size)
 
         x, y = self.thumbnail_area.get_point("center")
-        self.screen.addshape(self.puz_data["thumbnail"])
+        if self.thumbnail_button is not None:
+            self.retire(self.thumbnail_button)
         self.thumbnail_button = Button(self.tile_size, self.tile_size, x, y,
-                                       shape=self.puz_data["thumbnail"], visible=False)
+                                       shape=self.shapes.get(self.puz_data["thumbnail"]), visible=False)
 
         self.thumbnail_button.showturtle()
 
@@ -144,9 +189,12 @@ class View:
             for j in range(n):
                 self.tile_locations.append((x + (SPACING + self.tile_size) * j, y - (SPACING + self.tile_size) * i))
 
+    @timed("view_create_tiles")
     def create_tiles(self, gameboard: list[int]):
 
         self.create_tile_locations()
+        for tile in self.tiles.values():
+            self.retire(tile)
         self.tiles = {}
 
         for image in range(len(gameboard)):
@@ -157,17 +205,86 @@ class View:
             if gameboard[image] == len(self.puz_data["images"].values()):
                 t = Button(self.tile_size, self.tile_size, x, y, visible=False)
             else:
-                self.screen.addshape(self.puz_data["images"].get(gameboard[image]))
-                t = Button(self.tile_size, self.tile_size, x, y, self.puz_data["images"].get(gameboard[image]),
-                           visible=False)
+                t = Button(self.tile_size, self.tile_size, x, y,
+                           self.shapes.get(self.puz_data["images"].get(gameboard[image])), visible=False)
                 t.showturtle()
             self.tiles[gameboard[image]] = t
-            turtle.update()
+
+    def retire(self, button: Button) -> None:
+        """
+        This function hides a button of a previous game and lets go of its image so that it can be evicted
+        :param button: the button that is no longer used
+        :return: None
+        """
+        shape = button.shape()
+        button.hideturtle()
+        button.shape("blank")
+        self.shapes.release(shape)
+
+    def preload_puzzle(self, puz_data: dict) -> None:
+        """
+        This function decodes the images of the given puzzle in the background
+        :param puz_data: the data of the puzzle
+        :return: None
+        """
+        self.shapes.preload([puz_data["thumbnail"], *puz_data["images"].values()])
+
+    def quit(self) -> None:
+        """
+        This function closes the game window
+        :return: None
+        """
+        self.renderer.close()
+        turtle.bye()
 
     def return_home(self):
         for tile_num in self.tiles.keys():
             self.tiles[tile_num].setpos(*self.tile_locations[tile_num - 1])
 
+    def show_hint(self, tile: int) -> None:
+        """
+        This function highlights the given tile as the next tile to move, replacing any previous highlight
+        :param tile: the tile to highlight
+        :return: None
+        """
+        self.clear_hint()
+        self.hint_marker.set_point(self.tiles[tile].pos(), "center")
+        self.hint_marker.draw_rectangle(color=HINT_COLOR)
+
+    def clear_hint(self) -> None:
+        """
+        This function removes the highlight of the hinted tile and the message about it
+        :return: None
+        """
+        if self.hint_marker is not None:
+            self.hint_marker.clear()
+        self.clear_message()
+
+    def show_message(self, text: str) -> None:
+        """
+        This function writes a short message to the player at the bottom of the control area, replacing any previous
+        message
+        :param text: the message
+        :return: None
+        """
+        if self.message_area is None:
+            self.message_area = turtle.Turtle(visible=False)
+            self.message_area.penup()
+        self.message_area.clear()
+        self.message_area.setpos(*self.control_area.get_point("bottom-left", x_offset=-2 * SPACING,
+                                                              y_offset=-2 * SPACING))
+        self.message_area.write(text, font=MESSAGE_FONT)
+        self.message_shown = True
+
+    def clear_message(self) -> None:
+        """
+        This function removes the message to the player
+        :return: None
+        """
+        if self.message_shown:
+            self.message_area.clear()
+            self.message_shown = False
+
     def update_move_count(self, count, initial=False):
         if not initial:
             self.control_area.undo()
@@ -180,10 +297,11 @@ class View:
 
     def win(self):
         self.tile_utility.setpos(0, 0)
-        self.tile_utility.shape(rfc.WINNER)
+        self.tile_utility.shape(self.shapes.get(rfc.WINNER))
         self.tile_utility.showturtle()
 
 
+    @timed("view_process_clicks")
     def process_clicks(self, x, y, moves):
         if self.quit_button.is_clicked(x, y):
             self.quit_button.funct()
@@ -196,17 +314,32 @@ class View:
             return "reset"
         if self.thumbnail_button.is_clicked(x, y):
             return "replay"
+        if self.hint_button.is_clicked(x, y):
+            return "hint"
+        if self.solve_button.is_clicked(x, y):
+            return "solve"
+        if self.undo_button.is_clicked(x, y):
+            return "undo"
+        if self.redo_button.is_clicked(x, y):
+            return "redo"
         for tile in moves:
             if self.tiles[tile].is_clicked(x, y):
-                blank_x, blank_y = self.tiles[len(self.tiles)].pos()
-                tile_x, tile_y = self.tiles[tile].pos()
-                self.tiles[tile].goto(blank_x, blank_y)
-                self.tiles[len(self.tiles)].goto(tile_x, tile_y)
-
-                turtle.update()
+                self.move_tile(tile)
                 return tile
         return None
 
+    def move_tile(self, tile: int) -> None:
+        """
+        This function switches the given tile with the blank space on the screen. It is shown at the end of the
+        current frame so that several moves can be shown at once
+        :param tile: the tile to move
+        :return: None
+        """
+        blank_x, blank_y = self.tiles[len(self.tiles)].pos()
+        tile_x, tile_y = self.tiles[tile].pos()
+        self.tiles[tile].goto(blank_x, blank_y)
+        self.tiles[len(self.tiles)].goto(tile_x, tile_y)
+
 
 if __name__ == "__main__":
     view = View()
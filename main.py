@@ -1,9 +1,42 @@
+import os
+import sys
 from Controller.controller import Controller
+from Controller.catalog_loader import CatalogLoader
+from Controller.profiler import Profiler, PROFILE_ENV
+from View.view import View
+from View.shape_registry import ShapeRegistry
 from turtle import done
 
 def main():
     Controller()
     done()
 
+def profile_main():
+    """
+    Runs the game with the startup and every click handler profiled. The profile is written to profile.pstats and
+    profile.collapsed, and the wall time of each phase is printed when the game closes.
+    :return: None
+    """
+    profiler = Profiler()
+    profiler.instrument(Controller, "run", "click")
+    profiler.instrument(Controller, "new_game", "new game")
+    profiler.instrument(Controller, "start_catalog_loading", "catalog scan")
+    profiler.instrument(CatalogLoader, "wait_for", "catalog first puzzle")
+    profiler.instrument(Controller, "finish_catalog_loading", "catalog merge")
+    profiler.instrument(ShapeRegistry, "register", "image decoding")
+    # waiting for the player is timed but not profiled
+    profiler.instrument(View, "get_player_name", "name prompt", profiled=False)
+    profiler.instrument(Controller, "load_puzzle", "load puzzle prompt", profiled=False)
+    try:
+        with profiler.phase("startup"):
+            Controller()
+        done()
+    finally:
+        profiler.write()
+        print(profiler.get_summary())
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if "--profile" in sys.argv[1:] or os.environ.get(PROFILE_ENV):
+        profile_main()
+    else:
+        main()
@@ -0,0 +1,172 @@
+"""
+solve_batch.py
+This file contains the command line entry point that solves many puzzles offline. Boards are read one per line from
+a file or stdin as tile numbers separated by spaces or commas, solved across a pool of processes and written as one
+JSON line per board as soon as it is solved. Lines may finish in any order; each carries the index of its board.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from time import perf_counter
+from Model.reduction_solver import ReductionSolver
+from Model.solver import Solver
+
+TIMEOUT = 60  # seconds a single board may take before it is reported as timed out
+PENDING_PER_WORKER = 4  # boards queued per worker, which bounds the memory used however large the input is
+
+
+def read_boards(lines):
+    """
+    This generator parses the boards from the given lines. Blank lines and lines starting with # are skipped.
+    :param lines: an iterable of text lines
+    :return: a generator of (index, board) where board is the list of tiles or the unparsable line
+    """
+    index = 0
+    for line in lines:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        try:
+            board = [int(tile) for tile in line.replace(",", " ").split()]
+        except ValueError:
+            board = line
+        yield index, board
+        index += 1
+
+
+def solve_board(index: int, board, time_limit, fast=False) -> dict:
+    """
+    This function solves one board in a worker process
+    :param index: the index of the board in the input
+    :param board: the list of tiles, or the line that could not be parsed
+    :param time_limit: the number of seconds the search may take
+    :param fast: whether to find a good solution of any board with the ReductionSolver instead of the optimal one
+    :return: the result of the board as a dictionary
+    """
+    result = {"index": index, "board": board}
+    start = perf_counter()
+    try:
+        if isinstance(board, str):
+            raise ValueError("board must be a list of tile numbers")
+        if fast:
+            return solve_board_fast(result, board, time_limit, start)
+        solver = Solver(board)
+        moves = solver.solve(time_limit)
+        result.update(status="solved", length=len(moves), moves=moves, nodes=solver.get_nodes_expanded())
+    except TimeoutError:
+        result.update(status="timeout", nodes=solver.get_nodes_expanded())
+    except ValueError as err:
+        result.update(status="error", error=str(err))
+    result["time"] = round(perf_counter() - start, 6)
+    return result
+
+
+def solve_board_fast(result: dict, board: list[int], time_limit, start: float) -> dict:
+    """
+    This function finds a good but not optimal solution of one board with the ReductionSolver
+    :param result: the result of the board so far
+    :param board: the list of tiles
+    :param time_limit: the number of seconds the solver may take
+    :param start: the time the board was started at
+    :return: the result of the board as a dictionary
+    """
+    solver = ReductionSolver(board, time_limit)
+    try:
+        moves = solver.solve()
+        result.update(status="solved", length=len(moves), moves=moves)
+    except TimeoutError:
+        result.update(status="timeout", length=solver.get_solution_length())
+    result["time"] = round(perf_counter() - start, 6)
+    return result
+
+
+def get_error_result(index: int, board, err: Exception) -> dict:
+    """
+    Returns the result of a board whose worker failed
+    :param index: the index of the board in the input
+    :param board: the board
+    :param err: the exception raised by the worker
+    :return: the result of the board as a dictionary
+    """
+    return {"index": index, "board": board, "status": "error", "error": f"{type(err).__name__}: {err}"}
+
+
+def write_results(futures, output, boards: dict) -> None:
+    """
+    Writes the results of the finished futures as JSON lines. A worker that failed, for example by running out of
+    memory or by dying, gives an error line for its board instead of stopping the batch.
+    :param futures: the finished futures
+    :param output: the text stream to write to
+    :param boards: the (index, board) of each pending future, from which the finished ones are removed
+    :return: None
+    """
+    for future in futures:
+        index, board = boards.pop(future)
+        try:
+            result = future.result()
+        except Exception as err:
+            result = get_error_result(index, board, err)
+        output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+def solve_all(lines, output, workers=None, time_limit=TIMEOUT, fast=False) -> None:
+    """
+    This function solves every board of the input across a process pool and streams the results to the output.
+    Only a bounded number of boards are read ahead of the workers.
+    :param lines: an iterable of text lines holding the boards
+    :param output: the text stream to write the JSON lines to
+    :param workers: the number of processes. Defaults to the number of CPUs
+    :param time_limit: the number of seconds a single board may take
+    :param fast: whether to find good solutions of any size instead of optimal ones
+    :return: None
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        boards = {}
+        for index, board in read_boards(lines):
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_results(done, output, boards)
+            try:
+                future = pool.submit(solve_board, index, board, time_limit, fast)
+            except BrokenProcessPool as err:
+                output.write(json.dumps(get_error_result(index, board, err)) + "\n")
+                continue
+            boards[future] = (index, board)
+            pending.add(future)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            write_results(done, output, boards)
+        output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve puzzles optimally and write one JSON line per board.")
+    parser.add_argument("input", nargs="?", help="file with one board per line. Reads stdin if not given")
+    parser.add_argument("-o", "--output", help="file to write the JSON lines to. Writes to stdout if not given")
+    parser.add_argument("-w", "--workers", type=int, help="number of processes. Defaults to the number of CPUs")
+    parser.add_argument("-t", "--timeout", type=float, default=TIMEOUT, help="seconds allowed per board")
+    parser.add_argument("-f", "--fast", action="store_true",
+                        help="find good but not optimal solutions, for boards of any size")
+    args = parser.parse_args()
+
+    input_file = open(args.input, mode="r", encoding="utf-8") if args.input else sys.stdin
+    output_file = open(args.output, mode="w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        solve_all(input_file, output_file, args.workers, args.timeout, args.fast)
+    finally:
+        if args.input:
+            input_file.close()
+        if args.output:
+            output_file.close()
+
+
+if __name__ == '__main__':
+    main()
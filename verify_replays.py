@@ -0,0 +1,59 @@
+"""
+verify_replays.py
+This file contains the command line entry point that verifies every replay of a directory across a pool of processes.
+One JSON line is written per replay as soon as it is verified, and the exit status is 1 if any replay is invalid.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from Model.replay import verify_replay_file
+
+REPLAYS_PATH = "./Replays/"
+CHUNK_SIZE = 16  # replays sent to a worker at once, small replays are not worth a round trip each
+
+
+def find_replays(directory: str) -> list[str]:
+    """
+    This function lists the replay files of a directory
+    :param directory: the directory
+    :return: the sorted paths of the .replay files
+    """
+    with os.scandir(directory) as entries:
+        return sorted(entry.path for entry in entries if entry.is_file() and entry.name.endswith(".replay"))
+
+
+def verify_all(paths, output, workers=None) -> int:
+    """
+    This function verifies the given replays across a process pool and writes one JSON line per replay in order
+    :param paths: the paths of the replays
+    :param output: the text stream to write the JSON lines to
+    :param workers: the number of processes. Defaults to the number of CPUs
+    :return: the number of invalid replays
+    """
+    invalid = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for result in pool.map(verify_replay_file, paths, chunksize=CHUNK_SIZE):
+            if result["status"] != "ok":
+                invalid += 1
+            output.write(json.dumps(result) + "\n")
+    output.flush()
+    return invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify game replays and write one JSON line per replay.")
+    parser.add_argument("directory", nargs="?", default=REPLAYS_PATH, help="directory of the .replay files")
+    parser.add_argument("-w", "--workers", type=int, help="number of processes. Defaults to the number of CPUs")
+    args = parser.parse_args()
+
+    paths = find_replays(args.directory)
+    invalid = verify_all(paths, sys.stdout, args.workers)
+    print(f"{len(paths) - invalid} of {len(paths)} replays are valid", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())